@@ -1,9 +1,16 @@
 from django.views.generic.base import TemplateView
 
 
-class AboutAuthorView(TemplateView):
+class StaticPageView(TemplateView):
+    """Статичная страница: целиком кешируется для анонимов."""
+    def get(self, request, *args, **kwargs):
+        request.cache_scopes = ('about',)
+        return super().get(request, *args, **kwargs)
+
+
+class AboutAuthorView(StaticPageView):
     template_name = 'about/author.html'
 
 
-class AboutTechView(TemplateView):
+class AboutTechView(StaticPageView):
     template_name = 'about/tech.html'
@@ -0,0 +1,82 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import quote_etag
+
+GENERATION_KEY = 'generation:{}'
+CHANGED_KEY = 'changed:{}'
+
+
+def _initial_generation():
+    # Счетчик, потерянный при вытеснении, не должен вернуться к значению,
+    # под которым в кеше еще могут лежать старые фрагменты.
+    return int(time.time() * 1000)
+
+
+def get_generations(*names):
+    """Текущие поколения для names одним запросом к кешу."""
+    keys = [GENERATION_KEY.format(name) for name in names]
+    found = cache.get_many(keys)
+    missing = {
+        key: _initial_generation() for key in keys if key not in found
+    }
+    for key, value in missing.items():
+        if not cache.add(key, value, None):
+            missing[key] = cache.get(key, value)
+    found.update(missing)
+    return tuple(found[key] for key in keys)
+
+
+def get_changed_at(*names):
+    """Время (timestamp) последнего сдвига поколения любой из names.
+
+    Потерянное время считается текущим: так Last-Modified может только
+    сдвинуться вперед.
+    """
+    keys = [CHANGED_KEY.format(name) for name in names]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, time.time(), None)
+            found[key] = cache.get(key, time.time())
+    return max(found.values())
+
+
+def page_etag(request, generations):
+    """ETag страницы, собранной из областей с поколениями generations.
+
+    Тело страницы общее, но вставки (core.holes) у каждого свои,
+    поэтому в ETag входят пользователь и CSRF-cookie.
+    """
+    return quote_etag(hashlib.md5(':'.join(map(str, (
+        *generations,
+        request.user.pk,
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+        request.get_full_path(),
+    ))).encode()).hexdigest())
+
+
+def _bump(names):
+    now = time.time()
+    for name in names:
+        key = GENERATION_KEY.format(name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _initial_generation(), None)
+    cache.set_many({CHANGED_KEY.format(name): now for name in names}, None)
+
+
+def bump_generations(*names):
+    """Делает недействительным все, что закешировано под names.
+
+    Поколение сдвигается сразу и еще раз после фиксации транзакции:
+    иначе параллельный запрос успел бы положить в кеш под новым
+    поколением данные, прочитанные до коммита.
+    """
+    names = set(names)
+    _bump(names)
+    transaction.on_commit(lambda: _bump(names))
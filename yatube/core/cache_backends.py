@@ -0,0 +1,289 @@
+"""Кеш, общий для всех процессов узла, поверх файла SQLite в режиме WAL.
+
+В отличие от LocMemCache записи видят все воркеры, поэтому сдвиг
+поколения в одном процессе сразу сбрасывает фрагменты во всех.
+Объем ограничен MAX_SIZE байт и MAX_ENTRIES записей, при превышении
+вытесняются давно не читавшиеся записи (LRU).
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache_backends.SQLiteCache',
+            'LOCATION': '/var/tmp/yatube-cache.sqlite3',
+            'OPTIONS': {'MAX_SIZE': 256 * 1024 * 1024},
+        }
+    }
+
+Нужен SQLite не ниже 3.24 (ON CONFLICT DO UPDATE); с 3.35 incr()
+обходится одним UPDATE ... RETURNING.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.exceptions import ImproperlyConfigured
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires REAL,
+    accessed REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed);
+CREATE TABLE IF NOT EXISTS cache_stats (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    entries INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO cache_stats VALUES (1, 0, 0);
+CREATE TRIGGER IF NOT EXISTS cache_insert AFTER INSERT ON cache BEGIN
+    UPDATE cache_stats SET entries = entries + 1, size = size + new.size;
+END;
+CREATE TRIGGER IF NOT EXISTS cache_delete AFTER DELETE ON cache BEGIN
+    UPDATE cache_stats SET entries = entries - 1, size = size - old.size;
+END;
+CREATE TRIGGER IF NOT EXISTS cache_update AFTER UPDATE OF size ON cache
+BEGIN
+    UPDATE cache_stats SET size = size - old.size + new.size;
+END;
+'''
+UPSERT = (
+    'INSERT INTO cache VALUES (?, ?, ?, ?, ?) '
+    'ON CONFLICT (key) DO UPDATE SET value = excluded.value, '
+    'expires = excluded.expires, accessed = excluded.accessed, '
+    'size = excluded.size'
+)
+INCR = (
+    "UPDATE cache SET value = value + ? WHERE key = ? "
+    "AND typeof(value) = 'integer' AND (expires IS NULL OR expires > ?)"
+)
+MIN_SQLITE_VERSION = (3, 24)
+HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35)
+# Время чтения записи обновляется не чаще раза в секунду: точности LRU
+# хватает, а чтения почти никогда не превращаются в записи.
+ACCESS_RESOLUTION = 1.0
+
+
+class SQLiteCache(BaseCache):
+    def __init__(self, location, params):
+        if sqlite3.sqlite_version_info < MIN_SQLITE_VERSION:
+            raise ImproperlyConfigured(
+                'SQLiteCache требует SQLite %s или новее, установлен %s.' % (
+                    '.'.join(map(str, MIN_SQLITE_VERSION)),
+                    sqlite3.sqlite_version
+                )
+            )
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._path = location
+        self._max_size = int(options.get('MAX_SIZE', 64 * 1024 * 1024))
+        self._local = threading.local()
+
+    @property
+    def _db(self):
+        # Соединение на поток и на процесс: после fork чужое не годится.
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(self._path, timeout=30, isolation_level=None)
+            db.execute('PRAGMA journal_mode = WAL')
+            db.execute('PRAGMA synchronous = NORMAL')
+            db.executescript(SCHEMA)
+            self._local.db, self._local.pid = db, os.getpid()
+        return db
+
+    @staticmethod
+    def _dump(value):
+        # Целые хранятся как есть, чтобы incr() был одним UPDATE.
+        if type(value) is int:
+            return value
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _load(value):
+        return value if isinstance(value, int) else pickle.loads(value)
+
+    def _expires(self, timeout):
+        # get_backend_timeout() уже возвращает абсолютное время.
+        return self.get_backend_timeout(timeout)
+
+    @staticmethod
+    def _size(value):
+        return len(value) if isinstance(value, bytes) else 8
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version=version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        keys = {self._key(key, version): key for key in keys}
+        if not keys:
+            return {}
+        now = time.time()
+        rows = self._db.execute(
+            'SELECT key, value, accessed FROM cache WHERE key IN ({}) '
+            'AND (expires IS NULL OR expires > ?)'.format(
+                ', '.join('?' * len(keys))
+            ),
+            (*keys, now)
+        ).fetchall()
+        stale = [key for key, _, accessed in rows
+                 if accessed < now - ACCESS_RESOLUTION]
+        if stale:
+            self._db.execute(
+                'UPDATE cache SET accessed = ? WHERE key IN ({})'.format(
+                    ', '.join('?' * len(stale))
+                ),
+                (now, *stale)
+            )
+        return {keys[key]: self._load(value) for key, value, _ in rows}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires, now = self._expires(timeout), time.time()
+        rows = []
+        for key, value in data.items():
+            value = self._dump(value)
+            rows.append((
+                self._key(key, version), value, expires, now, self._size(value)
+            ))
+        with self._transaction() as db:
+            # Не INSERT OR REPLACE: замена через удаление не запускает
+            # триггеры, считающие объем кеша.
+            db.executemany(UPSERT, rows)
+            self._cull(db)
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key, value = self._key(key, version), self._dump(value)
+        now = time.time()
+        with self._transaction() as db:
+            # Занять можно и ключ, чья запись уже истекла.
+            added = db.execute(
+                UPSERT + ' WHERE cache.expires IS NOT NULL '
+                'AND cache.expires <= ?',
+                (key, value, self._expires(timeout), now, self._size(value),
+                 now)
+            ).rowcount
+            self._cull(db)
+        return bool(added)
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        params = (delta, key, time.time())
+        if HAS_RETURNING:
+            # Один атомарный UPDATE на все процессы. fetchall(): пока
+            # строки RETURNING не дочитаны, оператор держит блокировку.
+            rows = self._db.execute(
+                INCR + ' RETURNING value', params
+            ).fetchall()
+        else:
+            # До SQLite 3.35: UPDATE и чтение в одной транзакции записи.
+            with self._transaction() as db:
+                rows = []
+                if db.execute(INCR, params).rowcount:
+                    rows = db.execute(
+                        'SELECT value FROM cache WHERE key = ?', (key,)
+                    ).fetchall()
+        if not rows:
+            raise ValueError("Key '%s' not found" % key)
+        return rows[0][0]
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return bool(self._db.execute(
+            'UPDATE cache SET expires = ? WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self._expires(timeout), self._key(key, version), time.time())
+        ).rowcount)
+
+    def has_key(self, key, version=None):
+        return self._db.execute(
+            'SELECT 1 FROM cache WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self._key(key, version), time.time())
+        ).fetchone() is not None
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version)
+
+    def delete_many(self, keys, version=None):
+        keys = [self._key(key, version) for key in keys]
+        if keys:
+            self._db.execute(
+                'DELETE FROM cache WHERE key IN ({})'.format(
+                    ', '.join('?' * len(keys))
+                ),
+                keys
+            )
+
+    def clear(self):
+        self._db.execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # Соединение живет весь процесс: открывать файл на каждый запрос
+        # дороже, чем держать его.
+        pass
+
+    def _transaction(self):
+        return _Transaction(self._db)
+
+    def _cull(self, db):
+        """Вытесняет истекшие, а затем самые старые по чтению записи."""
+        entries, size = db.execute(
+            'SELECT entries, size FROM cache_stats'
+        ).fetchone()
+        if entries <= self._max_entries and size <= self._max_size:
+            return
+        db.execute(
+            'DELETE FROM cache WHERE expires IS NOT NULL AND expires <= ?',
+            (time.time(),)
+        )
+        entries, size = db.execute(
+            'SELECT entries, size FROM cache_stats'
+        ).fetchone()
+        if entries <= self._max_entries and size <= self._max_size:
+            return
+        # Как и встроенные бэкенды, освобождаем сразу 1/cull_frequency
+        # записей, чтобы не чистить кеш на каждой записи.
+        while entries > self._max_entries or size > self._max_size:
+            chunk = entries
+            if self._cull_frequency:
+                chunk //= self._cull_frequency
+            db.execute(
+                'DELETE FROM cache WHERE key IN (SELECT key FROM cache '
+                'ORDER BY accessed LIMIT ?)',
+                (max(chunk, 1),)
+            )
+            entries, size = db.execute(
+                'SELECT entries, size FROM cache_stats'
+            ).fetchone()
+
+    def stats(self):
+        entries, size = self._db.execute(
+            'SELECT entries, size FROM cache_stats'
+        ).fetchone()
+        return {'entries': entries, 'size': size}
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE: запись берет блокировку сразу, без взаимоблокировок
+    при переходе читателя в писатели."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.execute('BEGIN IMMEDIATE')
+        return self.db
+
+    def __exit__(self, exc_type, exc, tb):
+        self.db.execute('ROLLBACK' if exc_type else 'COMMIT')
@@ -0,0 +1,71 @@
+"""Пользовательские вставки («дырки») в общих для всех страницах.
+
+Шаблон выводит на месте пользовательской части метку
+{% hole 'имя' параметр=значение %}, а core.middleware.PageCacheMiddleware
+заполняет метки для каждого запроса уже после того, как тело страницы
+взято из кеша. Так одно закешированное тело отдается и анонимам, и
+пользователям, а CSRF-токен, меню пользователя и кнопки у каждого свои.
+
+Вставка - функция (request, **параметры) -> str, зарегистрированная
+декоратором @hole('имя'). Параметры попадают в метку строками, поэтому
+в них передаются только имена и id, а не объекты.
+"""
+import re
+from urllib.parse import parse_qsl, urlencode
+
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
+from django.utils.html import format_html
+
+MARKER = '<!--hole:{}-->'
+MARKER_RE = re.compile(rb'<!--hole:(\w+)\??([^>]*)-->')
+CONTENT_TYPE = 'text/html'
+
+_holes = {}
+
+
+def hole(name):
+    """Регистрирует функцию, заполняющую вставку name."""
+    def decorator(func):
+        _holes[name] = func
+        return func
+    return decorator
+
+
+def marker(name, **params):
+    if params:
+        name = f'{name}?{urlencode(params)}'
+    return MARKER.format(name)
+
+
+def fill_holes(request, response):
+    """Заменяет метки в HTML-ответе вставками для request."""
+    if response.streaming or not response.get(
+        'Content-Type', ''
+    ).startswith(CONTENT_TYPE) or b'<!--hole:' not in response.content:
+        return response
+
+    def fill(match):
+        func = _holes.get(match.group(1).decode())
+        if func is None:
+            return match.group(0)
+        params = dict(parse_qsl(match.group(2).decode()))
+        return func(request, **params).encode()
+
+    response.content = MARKER_RE.sub(fill, response.content)
+    return response
+
+
+@hole('csrf_token')
+def csrf_token(request):
+    return format_html(
+        '<input type="hidden" name="csrfmiddlewaretoken" value="{}">',
+        get_token(request)
+    )
+
+
+@hole('user_nav')
+def user_nav(request, view_name=''):
+    return render_to_string(
+        'includes/holes/user_nav.html', {'view_name': view_name}, request
+    )
@@ -0,0 +1,93 @@
+import os
+import shutil
+import tempfile
+import time
+
+from django.core.cache.backends.db import DatabaseCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+from django.core.management.commands.createcachetable import (
+    Command as CreateCacheTable
+)
+from django.db import DEFAULT_DB_ALIAS, connection
+
+from core.cache_backends import SQLiteCache
+
+BENCHMARK_TABLE = 'cache_benchmark'
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает скорость SQLiteCache с LocMemCache и DatabaseCache '
+        'на типичных для сайта операциях.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--operations', type=int, default=5000)
+        parser.add_argument(
+            '--value-size',
+            type=int,
+            default=4096,
+            help='Размер значения в байтах, примерно как у фрагмента ленты.'
+        )
+
+    def handle(self, *args, operations, value_size, **options):
+        tmp = tempfile.mkdtemp()
+        create_table = CreateCacheTable()
+        create_table.verbosity = 0
+        create_table.create_table(
+            DEFAULT_DB_ALIAS, BENCHMARK_TABLE, dry_run=False
+        )
+        backends = {
+            'locmem': LocMemCache('benchmark', {}),
+            'db': DatabaseCache(BENCHMARK_TABLE, {}),
+            'sqlite': SQLiteCache(os.path.join(tmp, 'cache.sqlite3'), {}),
+        }
+        try:
+            self.stdout.write(
+                f'{"операция":<12}' + ''.join(
+                    f'{name:>12}' for name in backends
+                ) + '   (операций в секунду)'
+            )
+            results = {
+                name: self.run(cache, operations, 'x' * value_size)
+                for name, cache in backends.items()
+            }
+            for operation in results['locmem']:
+                self.stdout.write(f'{operation:<12}' + ''.join(
+                    f'{results[name][operation]:>12.0f}' for name in backends
+                ))
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'DROP TABLE {connection.ops.quote_name(BENCHMARK_TABLE)}'
+                )
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    @staticmethod
+    def run(cache, operations, value):
+        """Операций в секунду для каждого вида обращений к cache."""
+        # MAX_ENTRIES не должен вытеснять записи посреди замера.
+        cache._max_entries = operations * 2
+        keys = [f'key-{i}' for i in range(operations)]
+        timings = {}
+
+        def timed(name, calls, func):
+            start = time.perf_counter()
+            func()
+            timings[name] = calls / (time.perf_counter() - start)
+
+        timed('set', operations, lambda: [cache.set(k, value) for k in keys])
+        timed('get', operations, lambda: [cache.get(k) for k in keys])
+        timed('get_many', operations, lambda: [
+            cache.get_many(keys[i:i + 10]) for i in range(0, operations, 10)
+        ])
+        timed('miss', operations, lambda: [
+            cache.get(f'missing-{k}') for k in keys
+        ])
+        cache.set('counter', 0)
+        timed('incr', operations, lambda: [
+            cache.incr('counter') for _ in keys
+        ])
+        cache.clear()
+        return timings
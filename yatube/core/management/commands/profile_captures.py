@@ -0,0 +1,107 @@
+import io
+import json
+import os
+import pstats
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import profiling
+
+
+class Command(BaseCommand):
+    help = (
+        'Снимки профилей запросов (core.profiling): list - список, '
+        'show <снимок> - самые дорогие функции и SQL, diff <до> <после> - '
+        'разница по функциям, token - значение заголовка X-Profile.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'action', choices=('list', 'show', 'diff', 'token')
+        )
+        parser.add_argument('captures', nargs='*')
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument(
+            '--sort', default='cumulative', choices=('cumulative', 'tottime')
+        )
+
+    def handle(self, action, captures, limit, sort, **options):
+        if action == 'token':
+            self.stdout.write(profiling.make_token())
+            return
+        expected = {'list': 0, 'show': 1, 'diff': 2}[action]
+        if len(captures) != expected:
+            raise CommandError(f'{action}: нужно снимков - {expected}')
+        getattr(self, f'{action}_captures')(
+            *captures, limit=limit, sort=sort
+        )
+
+    def list_captures(self, limit, sort):
+        for meta in profiling.captures():
+            self.stdout.write(
+                '{name}  {status} {method} {path}  {view}  {ms:.1f} мс, '
+                'SQL: {count} за {sql:.1f} мс ({trigger})'.format(
+                    ms=meta['duration'] * 1000,
+                    count=len(meta['queries']),
+                    sql=sum(q['time'] for q in meta['queries']) * 1000,
+                    **meta
+                )
+            )
+
+    def show_captures(self, name, limit, sort):
+        meta, stats = self.load(name)
+        self.stdout.write(
+            f"{meta['method']} {meta['path']} -> {meta['status']}, "
+            f"{meta['duration'] * 1000:.1f} мс"
+        )
+        # OutputWrapper добавлял бы перевод строки к каждому куску print.
+        stats.stream = io.StringIO()
+        stats.sort_stats(sort).print_stats(limit)
+        self.stdout.write(stats.stream.getvalue())
+        self.stdout.write(f"SQL-запросов: {len(meta['queries'])}")
+        for query in sorted(
+            meta['queries'], key=lambda query: -query['time']
+        )[:limit]:
+            self.stdout.write(
+                f"{query['time'] * 1000:8.2f} мс  {query['sql']}"
+            )
+
+    def diff_captures(self, before, after, limit, sort):
+        """Функции, чье время (sort) изменилось сильнее всего."""
+        (meta_before, stats_before), (meta_after, stats_after) = (
+            self.load(before), self.load(after)
+        )
+        self.stdout.write(
+            'Время: {:.1f} -> {:.1f} мс, SQL-запросов: {} -> {}'.format(
+                meta_before['duration'] * 1000, meta_after['duration'] * 1000,
+                len(meta_before['queries']), len(meta_after['queries'])
+            )
+        )
+        column = 3 if sort == 'cumulative' else 2
+        times_before = {
+            func: row[column] for func, row in stats_before.stats.items()
+        }
+        times_after = {
+            func: row[column] for func, row in stats_after.stats.items()
+        }
+        changes = sorted(
+            (
+                (times_after.get(func, 0) - times_before.get(func, 0), func)
+                for func in times_before.keys() | times_after.keys()
+            ),
+            key=lambda change: -abs(change[0])
+        )
+        for delta, func in changes[:limit]:
+            self.stdout.write('{:+9.2f} мс  {}'.format(
+                delta * 1000, pstats.func_std_string(func)
+            ))
+
+    @staticmethod
+    def load(name):
+        path = os.path.join(settings.PROFILE_DIR, os.path.basename(name))
+        try:
+            with open(f'{path}.json') as file:
+                return json.load(file), pstats.Stats(f'{path}.prof')
+        except FileNotFoundError:
+            raise CommandError(f'Снимок {name} не найден')
@@ -0,0 +1,275 @@
+"""Метрики производительности в текстовом формате Prometheus.
+
+Каждый процесс копит счетчики и гистограммы в памяти и не чаще раза
+в FLUSH_INTERVAL секунд сбрасывает их в METRICS_DIR/<pid>-<старт>.json:
+время старта не дает новому процессу с тем же pid затереть чужой файл.
+Страница /metrics складывает файлы всех процессов, поэтому видит все
+воркеры, а запрос платит только за пару сложений под блокировкой.
+Файлы завершившихся процессов и не обновлявшиеся дольше MAX_AGE
+удаляются при сборе; падение суммы Prometheus считает перезапуском
+счетчика. Без METRICS_DIR метрики видны только в своем процессе.
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from django.conf import settings
+
+FLUSH_INTERVAL = 1.0
+MAX_AGE = 24 * 60 * 60
+
+TIME_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+SIZE_BUCKETS = (
+    1024, 4096, 16384, 65536, 262144, 1048576, 4194304
+)
+
+# Имя: (тип, описание, границы корзин гистограммы).
+METRICS = {
+    'yatube_request_duration_seconds': (
+        'histogram', 'Время ответа view.', TIME_BUCKETS
+    ),
+    'yatube_response_size_bytes': (
+        'histogram', 'Размер тела ответа.', SIZE_BUCKETS
+    ),
+    'yatube_requests_total': (
+        'counter', 'Ответы view по кодам статуса.', None
+    ),
+    'yatube_db_queries_total': (
+        'counter', 'SQL-запросы, выполненные при ответе view.', None
+    ),
+    'yatube_db_query_seconds_total': (
+        'counter', 'Время SQL-запросов при ответе view.', None
+    ),
+    'yatube_template_render_seconds_total': (
+        'counter', 'Время отрисовки шаблонов при ответе view.', None
+    ),
+    'yatube_template_seconds_total': (
+        'counter', 'Время шаблонов, include, тегов и фильтров.', None
+    ),
+    'yatube_template_calls_total': (
+        'counter', 'Вызовы шаблонов, include, тегов и фильтров.', None
+    ),
+    'yatube_cache_requests_total': (
+        'counter', 'Обращения к кешам: result - hit или miss.', None
+    ),
+}
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._flushed = 0.0
+        self._pid = self._started = None
+
+    def inc(self, metric, value=1, **labels):
+        key = (metric, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, metric, value, **labels):
+        buckets = METRICS[metric][2]
+        key = (metric, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [
+                    [0] * (len(buckets) + 1), 0, 0
+                ]
+            # Корзины хранятся не накопленными: так их проще складывать.
+            histogram[0][bisect_left(buckets, value)] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': [
+                    [name, dict(labels), value]
+                    for (name, labels), value in self._counters.items()
+                ],
+                'histograms': [
+                    [name, dict(labels), list(counts), total, count]
+                    for (name, labels), (counts, total, count)
+                    in self._histograms.items()
+                ],
+            }
+
+    def flush(self, force=False):
+        """Пишет снимок процесса в METRICS_DIR, если пора."""
+        directory = settings.METRICS_DIR
+        now = time.monotonic()
+        if not directory or not force and (
+            now - self._flushed < FLUSH_INTERVAL
+        ):
+            return
+        self._flushed = now
+        if self._pid != os.getpid():
+            # Первый сброс этого процесса, в том числе после fork.
+            self._pid, self._started = os.getpid(), int(time.time())
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{self._pid}-{self._started}.json')
+        with open(f'{path}.tmp', 'w') as file:
+            json.dump(self.snapshot(), file)
+        # Читатель видит либо старый, либо новый файл целиком.
+        os.replace(f'{path}.tmp', path)
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+registry = Registry()
+inc = registry.inc
+observe = registry.observe
+
+_render = threading.local()
+
+
+@contextmanager
+def render_timer():
+    """Копит время отрисовки шаблонов; вложенные шаблоны не в счет."""
+    depth = getattr(_render, 'depth', 0)
+    _render.depth = depth + 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _render.depth = depth
+        if not depth:
+            _render.seconds = getattr(_render, 'seconds', 0.0) + (
+                time.perf_counter() - start
+            )
+
+
+def take_render_time():
+    """Время отрисовки с прошлого вызова в этом потоке."""
+    seconds = getattr(_render, 'seconds', 0.0)
+    _render.seconds = 0.0
+    return seconds
+
+
+def record_template(key, seconds):
+    """Учитывает вызов части шаблона key = (вид, имя), см.
+    core.template_backends. Копится в потоке до take_template_timings():
+    блокировка реестра на каждый узел стоила бы дороже."""
+    timings = getattr(_render, 'timings', None)
+    if timings is None:
+        timings = _render.timings = {}
+    timing = timings.get(key)
+    if timing is None:
+        timings[key] = [1, seconds]
+    else:
+        timing[0] += 1
+        timing[1] += seconds
+
+
+def take_template_timings():
+    """{(вид, имя): [вызовы, секунды]} с прошлого вызова в этом потоке."""
+    timings = getattr(_render, 'timings', None) or {}
+    _render.timings = {}
+    return timings
+
+
+def collect():
+    """Снимки всех процессов (или только текущего без METRICS_DIR)."""
+    directory = settings.METRICS_DIR
+    if not directory:
+        return [registry.snapshot()]
+    registry.flush(force=True)
+    snapshots = []
+    for name in os.listdir(directory):
+        if not name.endswith('.json'):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            if _is_stale(name, os.path.getmtime(path)):
+                os.remove(path)
+                continue
+            with open(path) as file:
+                snapshots.append(json.load(file))
+        except (OSError, ValueError):
+            continue
+    return snapshots
+
+
+def _is_stale(name, modified):
+    """Файл снимка name от завершившегося или давно молчащего процесса."""
+    if time.time() - modified > MAX_AGE:
+        return True
+    try:
+        os.kill(int(name.split('-')[0].split('.')[0]), 0)
+    except ProcessLookupError:
+        return True
+    except (PermissionError, ValueError):
+        # Процесс чужого пользователя жив; имя не по схеме не трогаем.
+        pass
+    return False
+
+
+def _labels(labels, **extra):
+    labels = {**labels, **extra}
+    if not labels:
+        return ''
+    return '{%s}' % ','.join(
+        '{}="{}"'.format(key, str(value).replace('\\', r'\\').replace(
+            '"', r'\"'
+        ).replace('\n', r'\n'))
+        for key, value in sorted(labels.items())
+    )
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _merge(snapshots):
+    counters, histograms = {}, {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            key = (name, tuple(sorted(labels.items())))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, counts, total, count in snapshot['histograms']:
+            key = (name, tuple(sorted(labels.items())))
+            merged = histograms.setdefault(key, [[0] * len(counts), 0, 0])
+            merged[0] = [a + b for a, b in zip(merged[0], counts)]
+            merged[1] += total
+            merged[2] += count
+    return counters, histograms
+
+
+def render(snapshots):
+    """Сумма снимков в текстовом формате Prometheus."""
+    counters, histograms = _merge(snapshots)
+    lines = []
+    for name, (kind, description, buckets) in METRICS.items():
+        lines += [f'# HELP {name} {description}', f'# TYPE {name} {kind}']
+        if kind == 'counter':
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(
+                        f'{name}{_labels(dict(labels))} {_number(value)}'
+                    )
+            continue
+        for (metric, labels), (counts, total, count) in sorted(
+            histograms.items()
+        ):
+            if metric != name:
+                continue
+            labels = dict(labels)
+            cumulative = 0
+            for bound, bucket in zip((*buckets, '+Inf'), counts):
+                cumulative += bucket
+                lines.append('{}_bucket{} {}'.format(
+                    name, _labels(labels, le=bound), cumulative
+                ))
+            lines.append(f'{name}_sum{_labels(labels)} {_number(total)}')
+            lines.append(f'{name}_count{_labels(labels)} {count}')
+    return '\n'.join(lines) + '\n'
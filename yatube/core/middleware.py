@@ -0,0 +1,220 @@
+import hashlib
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.urls import Resolver404, resolve
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from . import metrics, profiling
+from .cache import get_changed_at, get_generations, page_etag
+from .holes import fill_holes
+
+PAGE_KEY = 'page:{}:{}'
+PAGE_SCOPES_KEY = 'page-scopes:{}'
+# Сколько самых долгих частей шаблонов писать в лог на запрос.
+TEMPLATE_LOG_LIMIT = 5
+
+template_logger = logging.getLogger('core.templates')
+
+
+class MetricsMiddleware:
+    """Собирает метрики core.metrics по каждому view из
+    METRICS_NAMESPACES: время ответа, число и время SQL-запросов, время
+    отрисовки шаблонов и размер ответа.
+
+    Время частей шаблонов (core.template_backends) копится по всем
+    запросам, а самые долгие за запрос пишутся в лог core.templates.
+
+    Стоит первым, чтобы учесть и остальные middleware, и попадания
+    полностраничного кеша.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryTimer()
+        metrics.take_render_time()
+        metrics.take_template_timings()
+        start = time.perf_counter()
+        with connection.execute_wrapper(queries):
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+        view = self.view_name(request)
+        if view is not None:
+            metrics.observe('yatube_request_duration_seconds', duration,
+                            view=view)
+            metrics.inc('yatube_requests_total', view=view,
+                        status=response.status_code)
+            metrics.inc('yatube_db_queries_total', queries.count, view=view)
+            metrics.inc('yatube_db_query_seconds_total', queries.seconds,
+                        view=view)
+            metrics.inc('yatube_template_render_seconds_total',
+                        metrics.take_render_time(), view=view)
+            if not response.streaming:
+                metrics.observe('yatube_response_size_bytes',
+                                len(response.content), view=view)
+            self.record_templates(view)
+        metrics.registry.flush()
+        return response
+
+    @staticmethod
+    def record_templates(view):
+        timings = metrics.take_template_timings()
+        for (kind, name), (calls, seconds) in timings.items():
+            metrics.inc('yatube_template_calls_total', calls,
+                        kind=kind, name=name)
+            metrics.inc('yatube_template_seconds_total', seconds,
+                        kind=kind, name=name)
+        if timings and template_logger.isEnabledFor(logging.DEBUG):
+            slowest = sorted(
+                timings.items(), key=lambda item: -item[1][1]
+            )[:TEMPLATE_LOG_LIMIT]
+            template_logger.debug('%s: %s', view, ', '.join(
+                f'{kind} {name} {calls}x {seconds * 1000:.1f} мс'
+                for (kind, name), (calls, seconds) in slowest
+            ))
+
+    @staticmethod
+    def view_name(request):
+        # Попадание полностраничного кеша отвечает до разбора URL.
+        match = request.resolver_match
+        if match is None:
+            try:
+                match = resolve(request.path_info)
+            except Resolver404:
+                return None
+        if match.namespace not in settings.METRICS_NAMESPACES:
+            return None
+        return match.view_name
+
+
+class QueryTimer:
+    """Обертка connection.execute_wrapper: число и время запросов."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+class ProfilingMiddleware:
+    """Снимает профиль запроса по требованию, см. core.profiling.
+
+    Стоит после AuthenticationMiddleware: флаг ?_profile=1 действует
+    только для сотрудников. Имя снимка возвращается в X-Profile-Capture.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        reason = profiling.trigger(request)
+        if reason is None:
+            return self.get_response(request)
+        capture = profiling.Capture()
+        with connection.execute_wrapper(capture.queries), capture:
+            response = self.get_response(request)
+        response['X-Profile-Capture'] = capture.save(
+            request, response, reason
+        )
+        return response
+
+
+class PageCacheMiddleware:
+    """Кеширует целые страницы для GET-запросов, общие для всех.
+
+    Страница попадает в кеш, если ее view объявил области кеша в
+    request.cache_scopes (см. posts.utils.conditional_page). Они же
+    служат surrogate-ключами: записи ищутся под текущими поколениями
+    областей, так что сдвиг поколения точечно сбрасывает все страницы
+    с этим постом, группой или автором, а заголовок Surrogate-Key
+    позволяет так же чистить кеш перед приложением.
+
+    В кеше лежит тело с метками пользовательских вставок (core.holes),
+    они заполняются для каждого запроса - и при попадании, и на любой
+    другой странице. Поэтому пользователи получают те же попадания,
+    что и анонимы. Стоит после AuthenticationMiddleware, чтобы
+    вставкам был доступен пользователь; у анонима без cookie сессии
+    это не стоит запросов к БД.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return fill_holes(request, self.get_response(request))
+        url = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        scopes = cache.get(PAGE_SCOPES_KEY.format(url))
+        if scopes is not None:
+            generations = get_generations(*scopes)
+            response = cache.get(self.page_key(url, generations))
+            if response is not None:
+                metrics.inc('yatube_cache_requests_total', cache='page',
+                            result='hit')
+                return self.cached_response(
+                    request, response, scopes, generations
+                )
+        response = self.get_response(request)
+        scopes = getattr(request, 'cache_scopes', None)
+        if scopes and self.is_cacheable_response(request, response):
+            scopes = tuple(scopes)
+            response['Surrogate-Key'] = ' '.join(scopes)
+            cache.set(PAGE_SCOPES_KEY.format(url), scopes, None)
+            cache.set(
+                self.page_key(url, get_generations(*scopes)), response,
+                settings.PAGE_CACHE_TIMEOUT
+            )
+            response['X-Page-Cache'] = 'miss'
+            metrics.inc('yatube_cache_requests_total', cache='page',
+                        result='miss')
+        return fill_holes(request, response)
+
+    @staticmethod
+    def cached_response(request, response, scopes, generations):
+        # Валидаторы в записи - от того, кто ее положил: пересчитываем.
+        response['X-Page-Cache'] = 'hit'
+        response['ETag'] = page_etag(request, generations)
+        last_modified = None
+        if request.user.is_authenticated:
+            del response['Last-Modified']
+        else:
+            last_modified = int(get_changed_at(*scopes))
+            response['Last-Modified'] = http_date(last_modified)
+        conditional = get_conditional_response(
+            request,
+            etag=response['ETag'],
+            last_modified=last_modified,
+            response=response
+        )
+        if conditional is not response:
+            return conditional
+        return fill_holes(request, response)
+
+    @staticmethod
+    def page_key(url, generations):
+        return PAGE_KEY.format(url, '.'.join(map(str, generations)))
+
+    @staticmethod
+    def is_cacheable_response(request, response):
+        match = request.resolver_match
+        return (
+            request.method == 'GET'
+            and match is not None
+            and match.namespace in settings.PAGE_CACHE_NAMESPACES
+            and response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+        )
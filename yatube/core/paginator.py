@@ -0,0 +1,51 @@
+"""Paginator админки для таблиц на миллионы строк.
+
+Точный COUNT(*) по всей таблице обходит ее целиком, поэтому на
+PostgreSQL число строк без фильтров берется из статистики БД, а в
+остальных случаях выборка считается не дальше COUNT_LIMIT строк.
+Приблизительное или обрезанное число видно в списке админки, см.
+templates/admin/posts/pagination.html.
+"""
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+COUNT_LIMIT = 10_000
+
+
+def estimate_count(model, using='default'):
+    """Примерное число строк таблицы model без ее обхода или None.
+
+    Оценку хранит только PostgreSQL (pg_class.reltuples). Наибольший
+    ключ на других БД не годится: после удалений, как у подписок, он
+    обещает страницы, которых нет.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+            [model._meta.db_table]
+        )
+        row = cursor.fetchone()
+    # До первого ANALYZE оценки нет: 0 или -1.
+    return row[0] if row and row[0] > 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    # estimated - число из статистики БД, capped - строк не меньше count.
+    estimated = capped = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_count(queryset.model, queryset.db)
+            if estimate is not None:
+                self.estimated = True
+                return estimate
+        # COUNT(*) по подзапросу с LIMIT: останавливается на COUNT_LIMIT.
+        count = queryset[:COUNT_LIMIT].count()
+        self.capped = count >= COUNT_LIMIT
+        return count
@@ -0,0 +1,139 @@
+"""Профилирование отдельных запросов в продакшене.
+
+Запрос профилируется, если у него есть подписанный заголовок
+X-Profile (см. make_token), если сотрудник добавил к URL ?_profile=1
+или если он выпал при выборке с долей PROFILE_SAMPLE_RATE. Снимок -
+статистика cProfile (<имя>.prof) и описание запроса со всеми его
+SQL-запросами (<имя>.json) - пишется в PROFILE_DIR, где хранятся
+только PROFILE_KEEP последних снимков. Смотреть и сравнивать их -
+командой profile_captures.
+"""
+import cProfile
+import json
+import os
+import random
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.core import signing
+from django.urls import Resolver404, resolve
+
+HEADER = 'HTTP_X_PROFILE'
+QUERY_FLAG = '_profile'
+TOKEN_VALUE = 'profile'
+TOKEN_SALT = 'core.profiling'
+
+
+def make_token():
+    """Значение заголовка X-Profile, действительное PROFILE_TOKEN_MAX_AGE
+    секунд."""
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign(TOKEN_VALUE)
+
+
+def trigger(request):
+    """Почему запрос надо профилировать, или None."""
+    token = request.META.get(HEADER)
+    if token:
+        try:
+            if signing.TimestampSigner(salt=TOKEN_SALT).unsign(
+                token, max_age=settings.PROFILE_TOKEN_MAX_AGE
+            ) == TOKEN_VALUE:
+                return 'header'
+        except signing.BadSignature:
+            pass
+    if QUERY_FLAG in request.GET and request.user.is_staff:
+        return 'staff'
+    rate = settings.PROFILE_SAMPLE_RATE
+    if rate and random.random() < rate:
+        return 'sample'
+    return None
+
+
+class QueryLog:
+    """Обертка connection.execute_wrapper: SQL и время каждого запроса."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'sql': sql,
+                'time': time.perf_counter() - start,
+            })
+
+
+class Capture:
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+        self.queries = QueryLog()
+        self.start = None
+        self.duration = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.disable()
+        self.duration = time.perf_counter() - self.start
+
+    def save(self, request, response, reason):
+        """Пишет снимок в PROFILE_DIR и возвращает его имя."""
+        directory = settings.PROFILE_DIR
+        os.makedirs(directory, exist_ok=True)
+        # Попадание полностраничного кеша отвечает до разбора URL.
+        try:
+            match = request.resolver_match or resolve(request.path_info)
+        except Resolver404:
+            match = None
+        # Имена сортируются по времени: по ним и идет ротация.
+        name = '{}-{}'.format(
+            datetime.now().strftime('%Y%m%d-%H%M%S-%f'), os.getpid()
+        )
+        self.profiler.dump_stats(os.path.join(directory, f'{name}.prof'))
+        with open(os.path.join(directory, f'{name}.json'), 'w') as file:
+            json.dump({
+                'name': name,
+                'created': time.time(),
+                'trigger': reason,
+                'method': request.method,
+                'path': request.get_full_path(),
+                'view': match.view_name if match else None,
+                'status': response.status_code,
+                'duration': self.duration,
+                'queries': self.queries.queries,
+            }, file, ensure_ascii=False, indent=1)
+        rotate(directory, settings.PROFILE_KEEP)
+        return name
+
+
+def captures(directory=None):
+    """Описания снимков от старых к новым."""
+    directory = directory or settings.PROFILE_DIR
+    if not os.path.isdir(directory):
+        return []
+    result = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith('.json'):
+            with open(os.path.join(directory, name)) as file:
+                result.append(json.load(file))
+    return result
+
+
+def rotate(directory, keep):
+    names = sorted(
+        name[:-len('.json')] for name in os.listdir(directory)
+        if name.endswith('.json')
+    )
+    for name in names[:max(len(names) - keep, 0)]:
+        for suffix in ('.json', '.prof'):
+            try:
+                os.remove(os.path.join(directory, name + suffix))
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,107 @@
+"""Бэкенд шаблонов Django, замеряющий отрисовку для core.metrics.
+
+Кроме общего времени отрисовки на запрос каждый скомпилированный шаблон
+однажды размечается: свое время и число вызовов копят сам файл
+шаблона, каждый {% include %}, {% url %}, теги и фильтры не из Django
+(post_cards, thumbnail, addclass...). Время включает вложенные узлы,
+поэтому include стоит не меньше подключаемого шаблона.
+"""
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.template import Node, engine
+from django.template.backends import django
+from django.template.backends.base import BaseEngine
+from django.template.base import VariableNode
+from django.template.defaulttags import URLNode
+from django.template.library import InclusionNode, SimpleNode
+from django.template.loader_tags import IncludeNode
+
+from . import metrics
+
+
+def _timed(func, kind, name):
+    key = (kind, name)
+
+    @wraps(func)
+    def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            metrics.record_template(key, time.perf_counter() - start)
+    return timed
+
+
+def _is_custom(func):
+    return not func.__module__.startswith('django.')
+
+
+def _node_label(node):
+    if isinstance(node, IncludeNode):
+        return 'include', node.template.token.strip('\'"')
+    if isinstance(node, URLNode):
+        return 'tag', 'url'
+    if isinstance(node, (SimpleNode, InclusionNode)):
+        return 'tag', node.func.__name__
+    if _is_custom(type(node)):
+        return 'tag', type(node).__name__
+    return None
+
+
+def instrument(template):
+    """Размечает скомпилированный шаблон один раз."""
+    if getattr(template, '_instrumented', False):
+        return template
+    template._instrumented = True
+    template.render = _timed(
+        template.render, 'template', template.name or '<string>'
+    )
+    for node in template.nodelist.get_nodes_by_type(Node):
+        label = _node_label(node)
+        if label is not None:
+            node.render = _timed(node.render, *label)
+        if isinstance(node, VariableNode):
+            node.filter_expression.filters = [
+                (_timed(func, 'filter', func.__name__), args)
+                if _is_custom(func) else (func, args)
+                for func, args in node.filter_expression.filters
+            ]
+    return template
+
+
+class Engine(engine.Engine):
+    # get_template() и {% extends %} получают шаблоны через find_template().
+    def find_template(self, name, dirs=None, skip=None):
+        template, origin = super().find_template(name, dirs, skip)
+        return instrument(template), origin
+
+    def from_string(self, template_code):
+        return instrument(super().from_string(template_code))
+
+
+class Template(django.Template):
+    def render(self, context=None, request=None):
+        with metrics.render_timer():
+            return super().render(context, request)
+
+
+class DjangoTemplates(django.DjangoTemplates):
+    def __init__(self, params):
+        # Как django.DjangoTemplates.__init__, но движок - свой Engine.
+        params = params.copy()
+        options = params.pop('OPTIONS').copy()
+        options.setdefault('autoescape', True)
+        options.setdefault('debug', settings.DEBUG)
+        options['libraries'] = self.get_templatetag_libraries(
+            options.get('libraries', {})
+        )
+        BaseEngine.__init__(self, params)
+        self.engine = Engine(self.dirs, self.app_dirs, **options)
+
+    def from_string(self, template_code):
+        return Template(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return Template(super().get_template(template_name).template, self)
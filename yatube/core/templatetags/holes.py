@@ -0,0 +1,14 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from core.holes import marker
+
+register = template.Library()
+
+
+@register.simple_tag
+def hole(name, **params):
+    """Метка пользовательской вставки name, см. core.holes."""
+    return mark_safe(marker(name, **{
+        key: '' if value is None else value for key, value in params.items()
+    }))
@@ -0,0 +1,86 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase
+
+from core.cache_backends import SQLiteCache
+
+
+def make_cache(path, **options):
+    return SQLiteCache(path, {'OPTIONS': options})
+
+
+def increment(path, times):
+    cache = make_cache(path)
+    for _ in range(times):
+        cache.incr('counter')
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'cache.sqlite3')
+        self.cache = make_cache(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_basic_operations(self):
+        cache = self.cache
+        cache.set('key', {'value': [1, 2]})
+        self.assertEqual(cache.get('key'), {'value': [1, 2]})
+        self.assertFalse(cache.add('key', 'other'))
+        self.assertTrue(cache.add('new', 1))
+        self.assertEqual(cache.incr('new', 5), 6)
+        self.assertEqual(cache.get_many(['key', 'new', 'missing']), {
+            'key': {'value': [1, 2]}, 'new': 6
+        })
+        with self.assertRaises(ValueError):
+            cache.incr('missing')
+        cache.set('expired', 1, -1)
+        self.assertIsNone(cache.get('expired'))
+        self.assertTrue(cache.add('expired', 2))
+        cache.delete_many(['key', 'new'])
+        self.assertFalse(cache.has_key('key'))
+        cache.clear()
+        self.assertEqual(cache.stats(), {'entries': 0, 'size': 0})
+
+    def test_incr_without_returning(self):
+        with mock.patch('core.cache_backends.HAS_RETURNING', False):
+            self.cache.set('counter', 1)
+            self.assertEqual(self.cache.incr('counter', 2), 3)
+            with self.assertRaises(ValueError):
+                self.cache.incr('missing')
+
+    def test_old_sqlite_is_rejected(self):
+        with mock.patch('sqlite3.sqlite_version_info', (3, 22, 0)):
+            with self.assertRaises(ImproperlyConfigured):
+                make_cache(self.path)
+
+    def test_entries_are_shared_between_processes(self):
+        self.cache.set('counter', 0)
+        processes = [
+            multiprocessing.Process(target=increment, args=(self.path, 50))
+            for _ in range(4)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        self.assertEqual(self.cache.get('counter'), 200)
+
+    def test_lru_eviction_keeps_size_cap(self):
+        cache = make_cache(self.path, MAX_SIZE=10_000, CULL_FREQUENCY=4)
+        cache.set('hot', b'x' * 1000)
+        # Время чтения обновляется на каждом get, а не раз в секунду.
+        with mock.patch('core.cache_backends.ACCESS_RESOLUTION', -1):
+            for i in range(30):
+                cache.set(f'cold-{i}', b'x' * 1000)
+                cache.get('hot')
+        self.assertLessEqual(cache.stats()['size'], 10_000)
+        self.assertIsNotNone(cache.get('hot'))
+        self.assertIsNone(cache.get('cold-0'))
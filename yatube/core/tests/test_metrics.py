@@ -0,0 +1,143 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.core.cache import cache
+from django.template import engines
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core import metrics
+from core.template_backends import Engine
+from posts.models import Post, User
+
+
+class MetricsRenderTests(SimpleTestCase):
+    def setUp(self):
+        metrics.registry.clear()
+
+    def test_snapshots_of_processes_are_summed(self):
+        metrics.observe('yatube_request_duration_seconds', 0.02, view='a')
+        metrics.inc('yatube_db_queries_total', 3, view='a')
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+            METRICS_DIR=directory
+        ):
+            name = f'{os.getppid()}-0.json'
+            with open(os.path.join(directory, name), 'w') as file:
+                json.dump(metrics.registry.snapshot(), file)
+            text = metrics.render(metrics.collect())
+        self.assertIn('yatube_db_queries_total{view="a"} 6', text)
+        self.assertIn(
+            'yatube_request_duration_seconds_bucket{le="0.01",view="a"} 0',
+            text
+        )
+        self.assertIn(
+            'yatube_request_duration_seconds_bucket{le="0.025",view="a"} 2',
+            text
+        )
+        self.assertIn(
+            'yatube_request_duration_seconds_bucket{le="+Inf",view="a"} 2',
+            text
+        )
+        self.assertIn('yatube_request_duration_seconds_count{view="a"} 2',
+                      text)
+        self.assertIn('# TYPE yatube_request_duration_seconds histogram',
+                      text)
+
+    def test_stale_process_files_are_pruned(self):
+        dead = subprocess.run(
+            [sys.executable, '-c', 'import os; print(os.getpid())'],
+            stdout=subprocess.PIPE, check=True
+        ).stdout.decode().strip()
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+            METRICS_DIR=directory
+        ):
+            old = os.path.join(directory, f'{os.getppid()}-0.json')
+            for name in (f'{dead}-0.json', old):
+                with open(os.path.join(directory, name), 'w') as file:
+                    json.dump(metrics.registry.snapshot(), file)
+            past = time.time() - metrics.MAX_AGE - 1
+            os.utime(old, (past, past))
+            self.assertEqual(len(metrics.collect()), 1)
+            self.assertEqual(os.listdir(directory), [
+                f'{os.getpid()}-{metrics.registry._started}.json'
+            ])
+
+    def test_label_values_are_escaped(self):
+        metrics.inc('yatube_requests_total', view='a"b\\')
+        self.assertIn(
+            r'yatube_requests_total{view="a\"b\\"} 1',
+            metrics.render(metrics.collect())
+        )
+
+
+class MetricsMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        metrics.registry.clear()
+        Post.objects.create(
+            text='text', author=User.objects.create_user(username='author')
+        )
+
+    def test_views_are_measured_and_exposed(self):
+        url = reverse('posts:index')
+        self.client.get(url)
+        self.client.get(url)
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(
+            response['Content-Type'],
+            'text/plain; version=0.0.4; charset=utf-8'
+        )
+        text = response.content.decode()
+        self.assertIn(
+            'yatube_request_duration_seconds_count{view="posts:index"} 2',
+            text
+        )
+        self.assertIn(
+            'yatube_requests_total{status="200",view="posts:index"} 2', text
+        )
+        self.assertIn('yatube_db_queries_total{view="posts:index"}', text)
+        self.assertIn('yatube_template_render_seconds_total'
+                      '{view="posts:index"}', text)
+        self.assertIn('yatube_response_size_bytes_count'
+                      '{view="posts:index"} 2', text)
+        self.assertIn(
+            'yatube_cache_requests_total{cache="page",result="hit"} 1', text
+        )
+        self.assertIn(
+            'yatube_cache_requests_total{cache="page",result="miss"} 1', text
+        )
+        self.assertNotIn('view="metrics"', text)
+
+    def test_endpoint_is_hidden_from_outside(self):
+        response = self.client.get(
+            reverse('metrics'), REMOTE_ADDR='203.0.113.1'
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_template_parts_are_measured(self):
+        self.client.force_login(User.objects.get(username='author'))
+        with self.assertLogs('core.templates', 'DEBUG') as logs:
+            self.client.get(reverse('posts:post_create'))
+        self.assertIn('posts:post_create', logs.output[0])
+        text = metrics.render(metrics.collect())
+        for kind, name in (
+            ('template', 'posts/create_post.html'),
+            ('include', 'includes/header.html'),
+            ('tag', 'url'),
+            ('filter', 'addclass'),
+        ):
+            with self.subTest(kind=kind, name=name):
+                self.assertIn(
+                    'yatube_template_calls_total'
+                    f'{{kind="{kind}",name="{name}"}}', text
+                )
+
+    def test_engine_is_built_from_options(self):
+        backend = engines.all()[0]
+        self.assertIs(type(backend.engine), Engine)
+        self.assertIn('post_cards', backend.engine.libraries)
+        self.assertTrue(backend.engine.autoescape)
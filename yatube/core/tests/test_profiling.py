@@ -0,0 +1,87 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import profiling
+from posts.models import Post, User
+
+
+class ProfilingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        Post.objects.create(text='text', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        settings = override_settings(PROFILE_DIR=self.directory)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.url = reverse('posts:profile', kwargs={'username': 'author'})
+
+    def test_signed_header_captures_profile_and_sql(self):
+        response = self.client.get(
+            self.url, HTTP_X_PROFILE=profiling.make_token()
+        )
+        name = response['X-Profile-Capture']
+        self.assertTrue(
+            os.path.exists(os.path.join(self.directory, f'{name}.prof'))
+        )
+        meta, = profiling.captures()
+        self.assertEqual(meta['view'], 'posts:profile')
+        self.assertEqual(meta['trigger'], 'header')
+        self.assertTrue(meta['queries'])
+
+    def test_requests_are_not_profiled_without_trigger(self):
+        for headers in ({}, {'HTTP_X_PROFILE': 'forged'}):
+            response = self.client.get(f'{self.url}?_profile=1', **headers)
+            self.assertFalse(response.has_header('X-Profile-Capture'))
+        self.assertEqual(profiling.captures(), [])
+
+    def test_staff_flag(self):
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(f'{self.url}?_profile=1')
+        self.assertTrue(response.has_header('X-Profile-Capture'))
+
+    @override_settings(PROFILE_KEEP=2)
+    def test_only_latest_captures_are_kept(self):
+        names = [
+            self.client.get(
+                self.url, HTTP_X_PROFILE=profiling.make_token()
+            )['X-Profile-Capture']
+            for _ in range(3)
+        ]
+        self.assertEqual(
+            [meta['name'] for meta in profiling.captures()], names[1:]
+        )
+        self.assertEqual(len(os.listdir(self.directory)), 4)
+
+    def test_command_lists_shows_and_diffs(self):
+        before, after = (
+            self.client.get(
+                self.url, HTTP_X_PROFILE=profiling.make_token()
+            )['X-Profile-Capture']
+            for _ in range(2)
+        )
+        out = StringIO()
+        call_command('profile_captures', 'list', stdout=out)
+        self.assertIn(before, out.getvalue())
+        self.assertIn('posts:profile', out.getvalue())
+        out = StringIO()
+        # Второй запрос - попадание полностраничного кеша, без SQL.
+        call_command('profile_captures', 'show', before, stdout=out)
+        self.assertIn('function calls', out.getvalue())
+        self.assertIn('SELECT', out.getvalue())
+        out = StringIO()
+        call_command('profile_captures', 'diff', before, after, stdout=out)
+        self.assertIn('SQL-запросов', out.getvalue())
@@ -0,0 +1,75 @@
+import threading
+import time
+
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import SimpleTestCase, override_settings
+
+from core.tiered_cache import (
+    ENTRY_KEY, LOCK_KEY, clear_local, get_or_compute
+)
+
+
+class TieredCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        clear_local()
+        self.calls = 0
+
+    def compute(self, value='value', delay=0):
+        def compute():
+            self.calls += 1
+            time.sleep(delay)
+            return value
+        return compute
+
+    def test_concurrent_misses_compute_once(self):
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(
+                get_or_compute('key', self.compute(delay=0.1), 60)
+            ))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, ['value'] * 8)
+
+    def test_other_process_computing_serves_stale_value(self):
+        cache.set(ENTRY_KEY.format('key'), ('stale', 1000, time.time() + 1))
+        cache.add(LOCK_KEY.format('key'), 1)
+        self.assertEqual(get_or_compute('key', self.compute(), 60), 'stale')
+        self.assertEqual(self.calls, 0)
+
+    def test_early_refresh_depends_on_cost_and_remaining_time(self):
+        now = time.time()
+        cache.set(ENTRY_KEY.format('cheap'), ('old', 0.001, now + 60))
+        cache.set(ENTRY_KEY.format('costly'), ('old', 10 ** 6, now + 1))
+        self.assertEqual(get_or_compute('cheap', self.compute(), 60), 'old')
+        self.assertEqual(get_or_compute('costly', self.compute(), 60), 'value')
+
+    @override_settings(TIERED_CACHE_LOCAL_SIZE=10)
+    def test_local_tier_answers_without_shared_cache(self):
+        get_or_compute('key', self.compute(), None)
+        cache.clear()
+        self.assertEqual(get_or_compute('key', self.compute('new'), None),
+                         'value')
+        clear_local()
+        self.assertEqual(get_or_compute('key', self.compute('new'), None),
+                         'new')
+
+    def test_template_tag(self):
+        template = Template(
+            '{% load tiered_cache %}'
+            '{% tiered_cache None fragment key %}{{ value }}'
+            '{% endtiered_cache %}'
+        )
+        self.assertEqual(template.render(Context({'key': 1, 'value': 'a'})),
+                         'a')
+        self.assertEqual(template.render(Context({'key': 1, 'value': 'b'})),
+                         'a')
+        self.assertEqual(template.render(Context({'key': 2, 'value': 'b'})),
+                         'b')
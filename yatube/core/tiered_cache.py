@@ -0,0 +1,145 @@
+"""Двухуровневый кеш с защитой от лавины промахов.
+
+Перед общим кешем (см. core.cache_backends) стоит LRU в памяти процесса.
+Когда записи нет, ее вычисляет один поток одного процесса: остальные
+потоки ждут его, а другие процессы ждут значения в общем кеше (или
+отдают старое, если оно есть). Записи с ограниченным временем жизни
+обновляются заранее с вероятностью, растущей к концу срока (XFetch):
+так одновременное истечение не обрушивает все запросы в БД.
+"""
+import math
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+from . import metrics
+
+ENTRY_KEY = 'tiered:{}'
+LOCK_KEY = 'tiered-lock:{}'
+# Сколько другие процессы ждут вычисления, прежде чем взяться сами.
+LOCK_TIMEOUT = 10
+POLL_INTERVAL = 0.05
+
+_local = OrderedDict()
+_local_lock = threading.Lock()
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+def clear_local():
+    with _local_lock:
+        _local.clear()
+
+
+def _local_get(key):
+    with _local_lock:
+        entry = _local.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= time.monotonic():
+            del _local[key]
+            return None
+        _local.move_to_end(key)
+        return entry[0]
+
+
+def _local_set(key, entry):
+    size = settings.TIERED_CACHE_LOCAL_SIZE
+    if not size:
+        return
+    ttl = settings.TIERED_CACHE_LOCAL_TIMEOUT
+    expires = entry[2]
+    if expires is not None:
+        ttl = min(ttl, expires - time.time())
+    with _local_lock:
+        _local[key] = (entry, time.monotonic() + ttl)
+        _local.move_to_end(key)
+        while len(_local) > size:
+            _local.popitem(last=False)
+
+
+def _should_refresh(entry, beta):
+    """XFetch: чем ближе конец срока и дольше вычисление, тем вероятнее."""
+    _, delta, expires = entry
+    if expires is None:
+        return False
+    return time.time() - delta * beta * math.log(
+        1 - random.random()
+    ) >= expires
+
+
+def get_or_compute(key, compute, timeout=DEFAULT_TIMEOUT, beta=1.0):
+    """Значение key из кеша или результат compute(), вычисленный однажды.
+
+    timeout - как у cache.set(); None - бессрочно (так кешируются
+    фрагменты под поколениями, которые сбрасываются сменой ключа).
+    """
+    entry = _local_get(key)
+    if entry is None:
+        entry = cache.get(ENTRY_KEY.format(key))
+        if entry is not None:
+            _local_set(key, entry)
+    if entry is not None and not _should_refresh(entry, beta):
+        metrics.inc('yatube_cache_requests_total', cache='tiered',
+                    result='hit')
+        return entry[0]
+    metrics.inc('yatube_cache_requests_total', cache='tiered', result='miss')
+    return _compute_once(key, compute, timeout, entry)
+
+
+def _compute_once(key, compute, timeout, stale):
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = threading.Event()
+    if not leader:
+        if stale is not None:
+            return stale[0]
+        flight.wait(LOCK_TIMEOUT)
+        entry = _local_get(key) or cache.get(ENTRY_KEY.format(key))
+        if entry is not None:
+            return entry[0]
+        return compute()
+    try:
+        return _compute_shared(key, compute, timeout, stale)
+    finally:
+        with _flights_lock:
+            del _flights[key]
+        flight.set()
+
+
+def _compute_shared(key, compute, timeout, stale):
+    lock = LOCK_KEY.format(key)
+    locked = cache.add(lock, 1, LOCK_TIMEOUT)
+    if not locked:
+        if stale is not None:
+            return stale[0]
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(POLL_INTERVAL)
+            entry = cache.get(ENTRY_KEY.format(key))
+            if entry is not None:
+                _local_set(key, entry)
+                return entry[0]
+        # Владелец блокировки завис или упал: считаем сами.
+    try:
+        start = time.time()
+        value = compute()
+        now = time.time()
+        if timeout == DEFAULT_TIMEOUT:
+            timeout = cache.default_timeout
+        entry = (
+            value, now - start, None if timeout is None else now + timeout
+        )
+        cache.set(ENTRY_KEY.format(key), entry, timeout)
+        _local_set(key, entry)
+        return value
+    finally:
+        if locked:
+            cache.delete(lock)
@@ -1,5 +1,9 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse
 from django.shortcuts import render
 
+from . import metrics as metrics_registry
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -13,3 +17,17 @@ def server_error(request, exception=None, *_, **_k):
     return render(request, "core/500.html", {
         "exception": exception
     })
+
+
+def metrics(request):
+    """Метрики всех процессов в формате Prometheus, только для
+    INTERNAL_IPS и сотрудников."""
+    if not (
+        request.META.get('REMOTE_ADDR') in settings.INTERNAL_IPS
+        or request.user.is_staff
+    ):
+        raise Http404
+    return HttpResponse(
+        metrics_registry.render(metrics_registry.collect()),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
@@ -0,0 +1,188 @@
+"""Read-only JSON API лент.
+
+Ответы собираются прямо из строк values(): без экземпляров моделей и
+шаблонов. Страницы выбираются по курсору ?after=, как в HTML-лентах.
+"""
+import hashlib
+
+from django.core.files.storage import default_storage
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag, urlencode
+from django.views.decorators.http import condition
+
+from core.cache import get_generations
+
+from .models import Comment, Group, Post, TimelineEntry, User
+from .utils import (
+    COUNT_DISPLAYED_OBJECTS, FEED_KEYS, GROUPS_SCOPE, CursorPaginator,
+    decode_cursor
+)
+
+# Без comments_count: комментарий сдвигает только поколение post-<id>,
+# и ETag ленты с таким полем отдавал бы 304 на устаревшее число.
+POST_FIELDS = (
+    'id', 'text', 'created',
+    'image', 'image_width', 'image_height',
+    'author__username', 'author__first_name', 'author__last_name',
+    'group__slug', 'group__title',
+)
+COMMENT_FIELDS = ('id', 'text', 'created', 'author__username')
+
+
+def post_values(queryset, prefix='', extra=()):
+    return queryset.values(
+        *(prefix + field for field in (*POST_FIELDS, *extra))
+    )
+
+
+def serialize_post(row, prefix=''):
+    def value(field):
+        return row[prefix + field]
+
+    data = {
+        'id': value('id'),
+        'text': value('text'),
+        'created': value('created'),
+        'author': {
+            'username': value('author__username'),
+            'first_name': value('author__first_name'),
+            'last_name': value('author__last_name'),
+        },
+        'group': {
+            'slug': value('group__slug'),
+            'title': value('group__title'),
+        } if value('group__slug') else None,
+        'image': {
+            'url': default_storage.url(value('image')),
+            'width': value('image_width'),
+            'height': value('image_height'),
+        } if value('image') else None,
+    }
+    if prefix + 'comments_count' in row:
+        data['comments_count'] = value('comments_count')
+    return data
+
+
+def serialize_comment(row):
+    return {
+        'id': row['id'],
+        'text': row['text'],
+        'created': row['created'],
+        'author': row['author__username'],
+    }
+
+
+def error(message, status):
+    return JsonResponse({'error': message}, status=status)
+
+
+def cursor_page(request, rows, serialize, keys=FEED_KEYS):
+    """Словарь страницы rows после курсора ?after= или None для плохого."""
+    after = request.GET.get('after')
+    bound = decode_cursor(after) if after else None
+    if after and bound is None:
+        return None
+    page = CursorPaginator(
+        rows.order_by(*(f'-{key}' for key in keys)),
+        COUNT_DISPLAYED_OBJECTS,
+        keys=keys
+    ).cursor_page(bound)
+    return {
+        'results': [serialize(row) for row in page],
+        'next': page.next_cursor and request.build_absolute_uri(
+            '?' + urlencode({'after': page.next_cursor})
+        ),
+    }
+
+
+def feed_response(request, rows, **extra):
+    data = cursor_page(request, rows, serialize_post)
+    if data is None:
+        return error('Неверный курсор.', 400)
+    return JsonResponse({**extra, **data})
+
+
+def generation_etag(scopes):
+    """ETag из поколений областей кеша и адреса запроса.
+
+    Совпавший If-None-Match отвечает 304 до единого запроса к ленте.
+    """
+    def etag_func(request, **kwargs):
+        generations = get_generations(*scopes(**kwargs))
+        return hashlib.md5(
+            f'{generations}:{request.get_full_path()}'.encode()
+        ).hexdigest()
+    return condition(etag_func=etag_func)
+
+
+@generation_etag(lambda: ('index', GROUPS_SCOPE))
+def index(request):
+    return feed_response(request, post_values(Post.objects))
+
+
+@generation_etag(lambda slug: (f'group-{slug}',))
+def group_list(request, slug):
+    group = Group.objects.filter(slug=slug).values(
+        'slug', 'title', 'description'
+    ).first()
+    if group is None:
+        return error('Группа не найдена.', 404)
+    return feed_response(
+        request,
+        post_values(Post.objects.filter(group__slug=slug)),
+        group=group
+    )
+
+
+@generation_etag(lambda username: (f'author-{username}', GROUPS_SCOPE))
+def profile(request, username):
+    author = User.objects.filter(username=username).values(
+        'username', 'first_name', 'last_name'
+    ).first()
+    if author is None:
+        return error('Пользователь не найден.', 404)
+    return feed_response(
+        request,
+        post_values(Post.objects.filter(author__username=username)),
+        author=author
+    )
+
+
+@generation_etag(lambda post_id: (f'post-{post_id}', GROUPS_SCOPE))
+def post_detail(request, post_id):
+    post = post_values(
+        Post.objects.filter(pk=post_id), extra=('comments_count',)
+    ).first()
+    if post is None:
+        return error('Пост не найден.', 404)
+    comments = cursor_page(
+        request,
+        Comment.objects.filter(post_id=post_id).values(*COMMENT_FIELDS),
+        serialize_comment
+    )
+    if comments is None:
+        return error('Неверный курсор.', 400)
+    return JsonResponse({'post': serialize_post(post), 'comments': comments})
+
+
+def follow_index(request):
+    # У ленты подписок нет поколения в кеше, поэтому ETag - хеш ответа.
+    if not request.user.is_authenticated:
+        return error('Требуется авторизация.', 401)
+    prefix = 'post__'
+    data = cursor_page(
+        request,
+        TimelineEntry.objects.filter(user=request.user).values(
+            'created', 'post_id', *(prefix + f for f in POST_FIELDS)
+        ),
+        lambda row: serialize_post(row, prefix),
+        keys=('created', 'post_id')
+    )
+    if data is None:
+        return error('Неверный курсор.', 400)
+    response = JsonResponse(data)
+    patch_cache_control(response, private=True)
+    etag = quote_etag(hashlib.md5(response.content).hexdigest())
+    response['ETag'] = etag
+    return get_conditional_response(request, etag=etag, response=response)
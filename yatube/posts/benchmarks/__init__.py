@@ -0,0 +1,122 @@
+"""Микробенчмарки горячих мест posts: шаблонов, пагинации и страниц.
+
+Случаи лежат в bench_*.py и не попадают в обычный прогон тестов:
+
+    python manage.py test posts.benchmarks --pattern="bench_*.py"
+
+Для каждого случая замеряются время (лучшее из BENCHMARK_REPEAT
+прогонов), число SQL-запросов и пик памяти по tracemalloc. Результат
+сравнивается с baseline.json; случай падает, если вырос больше порога
+из BENCHMARK_THRESHOLDS. Эталон зависит от машины и переписывается так:
+
+    BENCHMARK_UPDATE=1 python manage.py test posts.benchmarks \\
+        --pattern="bench_*.py"
+"""
+import json
+import os
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.db import connection
+
+from core.middleware import QueryTimer
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+# Разница по времени меньше миллисекунды - шум, а не регрессия.
+TIME_NOISE = 1.0
+UNITS = {'time': 'мс', 'queries': 'запр.', 'memory': 'КиБ'}
+
+
+def calibrate(repeat=5):
+    """Время эталонной нагрузки на этой машине сейчас, в миллисекундах.
+
+    Замеряется рядом с каждым случаем и хранится вместе с ним: время
+    эталона масштабируется на отношение калибровок, чтобы общая
+    загрузка машины или другой процессор не выглядели регрессией.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        sorted(str(i) for i in range(100_000))
+        timings.append(time.perf_counter() - start)
+    return round(min(timings) * 1000, 3)
+
+
+def measure(func, setup=None, repeat=None):
+    """Замеряет func(); setup() вызывается перед каждым прогоном.
+
+    Время в миллисекундах, память в КиБ. Запросы и память считаются
+    в отдельных прогонах: трассировка замедляет код в разы.
+    """
+    timings = []
+    for _ in range(repeat or settings.BENCHMARK_REPEAT):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    if setup:
+        setup()
+    # Не CaptureQueriesContext: тестовый клиент очищает queries_log
+    # в начале каждого запроса.
+    queries = QueryTimer()
+    with connection.execute_wrapper(queries):
+        func()
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        'time': round(min(timings) * 1000, 3),
+        'queries': queries.count,
+        'memory': round(peak / 1024, 1),
+    }
+
+
+def regressions(result, baseline, thresholds=None):
+    """Описания метрик result, выросших относительно baseline сверх порога."""
+    thresholds = thresholds or settings.BENCHMARK_THRESHOLDS
+    speed = 1.0
+    if result.get('calibration') and baseline.get('calibration'):
+        speed = result['calibration'] / baseline['calibration']
+    found = []
+    for metric, limit in thresholds.items():
+        before, now = baseline.get(metric), result[metric]
+        if before is None:
+            continue
+        if metric == 'time':
+            before = round(before * speed, 3)
+        allowed = before * (1 + limit)
+        if metric == 'time':
+            allowed = max(allowed, before + TIME_NOISE)
+        if now > allowed:
+            found.append(
+                f'{metric}: {now} {UNITS[metric]} против {before} '
+                f'(допустимо до {allowed:.1f})'
+            )
+    return found
+
+
+def load_baseline(path=BASELINE_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_baseline(results, path=BASELINE_PATH):
+    """Дописывает results в эталон, не трогая остальные случаи."""
+    baseline = load_baseline(path)
+    baseline.update(results)
+    with open(path, 'w') as file:
+        json.dump(baseline, file, indent=2, sort_keys=True, ensure_ascii=False)
+        file.write('\n')
+
+
+def should_update():
+    return bool(os.environ.get('BENCHMARK_UPDATE'))
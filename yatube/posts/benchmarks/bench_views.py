@@ -0,0 +1,167 @@
+import sys
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from posts import export, timeline
+from posts.models import Comment, Follow, Group, Post, User
+from posts.utils import COUNT_DISPLAYED_OBJECTS, encode_cursor, get_page
+
+from . import (
+    UNITS, calibrate, load_baseline, measure, regressions, save_baseline,
+    should_update
+)
+
+AUTHORS = 1000
+POSTS_PER_AUTHOR = 2
+COMMENTS = 1000
+PAGE_DEPTHS = (1, 10, 100)
+FOLLOWING = (10, 100, 1000)
+
+
+class ViewBenchmarks(TestCase):
+    results = {}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.baseline = load_baseline()
+        cls.factory = RequestFactory()
+
+    @classmethod
+    def setUpTestData(cls):
+        # Пароль не нужен: клиенты входят через force_login.
+        User.objects.bulk_create(
+            User(username=f'author-{i}', password='!')
+            for i in range(AUTHORS)
+        )
+        authors = list(User.objects.order_by('pk'))
+        group = Group.objects.create(
+            title='Группа', slug='group', description='-'
+        )
+        Post.objects.bulk_create(
+            Post(
+                text=f'Пост {i} автора {author.username}',
+                author=author,
+                group=group if i % 2 else None,
+            )
+            for author in authors for i in range(POSTS_PER_AUTHOR)
+        )
+        cls.post = Post.objects.order_by('pk').first()
+        Comment.objects.bulk_create(
+            Comment(
+                post=cls.post, author=authors[i % AUTHORS],
+                text=f'Комментарий {i}'
+            )
+            for i in range(COMMENTS)
+        )
+        cls.readers = {}
+        for count in FOLLOWING:
+            reader = User.objects.create(username=f'reader-{count}')
+            Follow.objects.bulk_create(
+                Follow(user=reader, author=author)
+                for author in authors[:count]
+            )
+            cls.readers[count] = reader
+        timeline.rebuild([reader.pk for reader in cls.readers.values()])
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.results:
+            cls.report()
+            if should_update():
+                save_baseline(cls.results)
+        super().tearDownClass()
+
+    @classmethod
+    def report(cls):
+        for name, result in sorted(cls.results.items()):
+            sys.stderr.write('\n{:<28}'.format(name) + '  '.join(
+                f'{result[metric]:>10} {unit}'
+                for metric, unit in UNITS.items()
+            ))
+        sys.stderr.write('\n')
+
+    def bench(self, name, func, setup=cache.clear):
+        # Калибровка перед каждым случаем: загрузка машины меняется.
+        calibration = calibrate()
+        result = dict(measure(func, setup), calibration=calibration)
+        self.results[name] = result
+        if should_update() or name not in self.baseline:
+            return
+        found = regressions(result, self.baseline[name])
+        if found:
+            self.fail(f'{name} медленнее эталона: ' + '; '.join(found))
+
+    def request(self, data=None):
+        request = self.factory.get('/', data)
+        request.user = AnonymousUser()
+        return request
+
+    def test_index_template(self):
+        """Отрисовка posts/index.html со страницей из 10 постов."""
+        request = self.request()
+        page_obj = get_page(request, Post.objects.for_feed())
+        page_obj.object_list = list(page_obj.object_list)
+        context = {
+            'page_obj': page_obj,
+            'feed_key': 'benchmark',
+            'title': 'Последние обновления на сайте',
+        }
+        self.bench('index_template', lambda: render_to_string(
+            'posts/index.html', context, request
+        ))
+
+    def test_pagination_depths(self):
+        """Страница ленты по номеру и по курсору все глубже от начала."""
+        posts = Post.objects.for_feed()
+        feed = list(posts.order_by('-created', '-id').values(
+            'created', 'id'
+        ))
+        for depth in PAGE_DEPTHS:
+            with self.subTest(depth=depth):
+                numbered = self.request({'page': depth})
+                self.bench(f'paginate_page_{depth}', lambda: list(
+                    get_page(numbered, posts)
+                ))
+                if depth == 1:
+                    continue
+                cursor = self.request({'after': encode_cursor(
+                    feed[(depth - 1) * COUNT_DISPLAYED_OBJECTS - 1]
+                )})
+                self.bench(f'paginate_cursor_{depth}', lambda: list(
+                    get_page(cursor, posts)
+                ))
+
+    def test_post_detail_with_comments(self):
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        self.assertContains(self.client.get(url), 'Комментарий 999')
+        self.bench(
+            f'post_detail_{COMMENTS}_comments',
+            lambda: self.client.get(url)
+        )
+
+    def test_follow_index(self):
+        url = reverse('posts:follow_index')
+        for count, reader in self.readers.items():
+            with self.subTest(following=count):
+                client = Client()
+                client.force_login(reader)
+                self.assertEqual(
+                    len(client.get(url).context['page_obj']),
+                    COUNT_DISPLAYED_OBJECTS
+                )
+                self.bench(
+                    f'follow_index_{count}_authors',
+                    lambda: client.get(url)
+                )
+
+    def test_export_posts(self):
+        """Выгрузка всех постов: пик памяти - одна пачка строк."""
+        def run():
+            for _ in export.stream('posts', 'jsonl', batch_size=500):
+                pass
+        self.bench('export_posts_jsonl', run)
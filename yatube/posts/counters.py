@@ -0,0 +1,48 @@
+from django.db.models import F
+
+from .models import Follow, Post, UserStats
+
+
+def recount_user(user_id):
+    """Пересчитывает счетчики пользователя с нуля."""
+    stats, _ = UserStats.objects.update_or_create(
+        user_id=user_id,
+        defaults={
+            'posts_count': Post.objects.filter(author_id=user_id).count(),
+            'followers_count': Follow.objects.filter(
+                author_id=user_id
+            ).count(),
+            'following_count': Follow.objects.filter(
+                user_id=user_id
+            ).count(),
+        }
+    )
+    return stats
+
+
+def get_user_stats(user):
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        return recount_user(user.pk)
+
+
+def change_user_counter(user_id, field, delta):
+    """Атомарно сдвигает счетчик пользователя на delta."""
+    stats = UserStats.objects.filter(user_id=user_id)
+    if delta < 0:
+        # Отсутствующая строка пересчитается при первом чтении, а при
+        # каскадном удалении пользователя создавать ее нельзя.
+        stats.filter(**{f'{field}__gte': -delta}).update(
+            **{field: F(field) + delta}
+        )
+    elif not stats.update(**{field: F(field) + delta}):
+        # Строки еще нет: полный пересчет уже учтет текущее изменение.
+        recount_user(user_id)
+
+
+def change_comments_count(post_id, delta):
+    posts = Post.objects.filter(pk=post_id)
+    if delta < 0:
+        posts = posts.filter(comments_count__gte=-delta)
+    posts.update(comments_count=F('comments_count') + delta)
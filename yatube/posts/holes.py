@@ -0,0 +1,36 @@
+"""Пользовательские вставки страниц постов, см. core.holes."""
+from django.template.loader import render_to_string
+
+from core.holes import hole
+
+from .forms import CommentForm
+from .models import Follow
+
+
+@hole('switcher')
+def switcher(request, view_name=''):
+    return render_to_string(
+        'includes/holes/switcher.html', {'view_name': view_name}, request
+    )
+
+
+@hole('follow_button')
+def follow_button(request, author):
+    following = request.user.is_authenticated and Follow.objects.filter(
+        user=request.user, author__username=author
+    ).exists()
+    return render_to_string(
+        'includes/holes/follow_button.html',
+        {'author': author, 'following': following},
+        request
+    )
+
+
+@hole('post_actions')
+def post_actions(request, post_id, author):
+    """Кнопка правки для автора и форма комментария с CSRF-токеном."""
+    return render_to_string(
+        'includes/holes/post_actions.html',
+        {'post_id': post_id, 'author': author, 'form': CommentForm()},
+        request
+    )
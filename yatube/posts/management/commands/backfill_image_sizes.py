@@ -0,0 +1,36 @@
+from django.core.files.images import get_image_dimensions
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+
+from .recount_counters import batches
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет ширину и высоту картинок постов, созданных до того, '
+        'как размеры стали сохраняться при загрузке.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, batch_size, **options):
+        missing = Post.objects.exclude(image='').filter(image_width=None)
+        filled = unreadable = 0
+        for ids in batches(missing, batch_size):
+            posts = list(Post.objects.filter(pk__in=ids).only('image'))
+            for post in posts:
+                try:
+                    with post.image.open('rb') as file:
+                        size = get_image_dimensions(file)
+                except OSError:
+                    size = (None, None)
+                post.image_width, post.image_height = size
+                unreadable += post.image_width is None
+            # bulk_update, а не save(): сигналы сбросили бы кеш каждого поста.
+            Post.objects.bulk_update(posts, ('image_width', 'image_height'))
+            filled += len(posts)
+        self.stdout.write(
+            f'Обработано постов: {filled}, не удалось прочитать: {unreadable}'
+        )
@@ -0,0 +1,58 @@
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from posts import export
+
+
+def moment(value):
+    """Дата или дата со временем из аргумента в aware datetime."""
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        parsed = datetime.combine(day, time())
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает посты, комментарии или подписки в stdout в CSV или '
+        'JSONL. Строки читаются пачками по id, поэтому память не растет '
+        'с размером таблицы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=tuple(export.EXPORTS))
+        parser.add_argument(
+            '--format', choices=tuple(export.WRITERS), default='csv'
+        )
+        parser.add_argument('--group', help='Slug группы.')
+        parser.add_argument('--author', help='Имя пользователя автора.')
+        parser.add_argument(
+            '--since', type=moment, help='Созданные с этой даты.'
+        )
+        parser.add_argument(
+            '--until', type=moment, help='Созданные до этой даты.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=export.BATCH_SIZE
+        )
+
+    def handle(self, *args, name, batch_size, **options):
+        filters = {
+            key: options[key] for key in ('group', 'author', 'since', 'until')
+        }
+        try:
+            chunks = export.stream(
+                name, options['format'], batch_size=batch_size, **filters
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        for chunk in chunks:
+            self.stdout.write(chunk, ending='')
@@ -0,0 +1,308 @@
+import json
+import math
+import queue
+import random
+import statistics
+import threading
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Count, Max
+from django.test import Client
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+from posts.urls import urlpatterns
+
+# Маршруты, которые меняют данные: замеряются только с --writes.
+WRITE_ROUTES = ('add_comment', 'profile_follow', 'profile_unfollow')
+SAMPLE_SIZE = 50
+# Не INTERNAL_IPS: иначе при DEBUG ответы дописывал бы debug_toolbar.
+REMOTE_ADDR = '192.0.2.1'
+
+
+def percentile(ordered, percent):
+    """Перцентиль по ближайшему рангу из отсортированных значений.
+
+    statistics.quantiles() появилась только в Python 3.8.
+    """
+    return ordered[max(math.ceil(len(ordered) * percent / 100) - 1, 0)]
+
+
+def summarize(timings, statuses, wall):
+    """Перцентили в миллисекундах и пропускная способность.
+
+    Без единого ответа времена - None.
+    """
+    ordered = sorted(timings)
+    result = {
+        'requests': len(timings),
+        'errors': sum(status >= 400 for status in statuses),
+        'p50': None,
+        'p95': None,
+        'p99': None,
+        'mean': None,
+        'throughput': len(timings) / wall,
+    }
+    if ordered:
+        result.update(
+            p50=percentile(ordered, 50) * 1000,
+            p95=percentile(ordered, 95) * 1000,
+            p99=percentile(ordered, 99) * 1000,
+            mean=statistics.mean(ordered) * 1000,
+        )
+    return result
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружает маршруты posts: через настоящие URLconf и middleware '
+        'параллельными клиентами и выводит p50/p95/p99 и пропускную '
+        'способность. Результат сохраняется в JSON для сравнения выпусков. '
+        'Данные для замера готовит команда seed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Запросов на каждый маршрут.'
+        )
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument(
+            '--routes', nargs='*',
+            help='Имена маршрутов без posts:, по умолчанию все.'
+        )
+        parser.add_argument('--writes', action='store_true')
+        parser.add_argument(
+            '--user', help='Читатель для страниц, требующих входа.'
+        )
+        parser.add_argument('--output', help='Куда сохранить JSON.')
+        parser.add_argument('--compare', help='JSON прошлого замера.')
+        parser.add_argument('--seed', type=int)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.reader = self.get_reader(options['user'])
+        self.samples = self.collect_samples()
+        routes = self.get_routes(options['routes'], options['writes'])
+        if settings.DEBUG:
+            self.stderr.write(
+                'DEBUG включен: запросы к БД пишутся в память, '
+                'замер будет медленнее продакшена.'
+            )
+        results = {}
+        for name, (login, make_request) in routes.items():
+            results[name] = self.run(
+                login, make_request,
+                options['requests'], options['concurrency']
+            )
+            self.report(name, results[name])
+        report = {
+            'started': datetime.now().isoformat(),
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+            'posts': self.samples['post_count'],
+            'routes': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(report, file, indent=2)
+        if options['compare']:
+            self.compare(options['compare'], results)
+
+    def get_reader(self, username):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f'Пользователь {username} не найден')
+        reader = User.objects.annotate(
+            follows=Count('follower')
+        ).order_by('-follows').first()
+        if reader is None:
+            raise CommandError('В базе нет пользователей: запустите seed.')
+        return reader
+
+    def pick_posts(self, count):
+        """Случайные посты без ORDER BY RANDOM() по всей таблице."""
+        last = Post.objects.aggregate(last=Max('pk'))['last'] or 0
+        ids = set()
+        for _ in range(count):
+            post_id = Post.objects.filter(
+                pk__gte=self.random.randint(1, last or 1)
+            ).order_by('pk').values_list('pk', flat=True).first()
+            if post_id is not None:
+                ids.add(post_id)
+        return list(ids)
+
+    def collect_samples(self):
+        post_ids = self.pick_posts(SAMPLE_SIZE)
+        posts = Post.objects.filter(pk__in=post_ids).select_related('author')
+        return {
+            'post_count': Post.objects.count(),
+            'post_ids': post_ids,
+            'usernames': list({post.author.username for post in posts}),
+            'slugs': list(Group.objects.values_list(
+                'slug', flat=True
+            )[:SAMPLE_SIZE]),
+            'words': list({
+                word.strip('.,!?') for post in posts
+                for word in post.text.split()[:3] if len(word) > 3
+            }),
+            'own_post_ids': list(Post.objects.filter(
+                author=self.reader
+            ).values_list('pk', flat=True)[:SAMPLE_SIZE]),
+        }
+
+    def get_routes(self, names, writes):
+        """{имя: (нужен ли вход, функция -> (метод, url, данные))}."""
+        samples, choice = self.samples, self.random.choice
+
+        def get(name, sample=None, key=None):
+            def make_request():
+                kwargs = {key: choice(samples[sample])} if sample else {}
+                return 'get', reverse(f'posts:{name}', kwargs=kwargs), None
+            return make_request
+
+        def search():
+            return 'get', reverse('posts:search'), {
+                'q': choice(samples['words'])
+            }
+
+        def add_comment():
+            return 'post', reverse('posts:add_comment', kwargs={
+                'post_id': choice(samples['post_ids'])
+            }), {'text': 'Замер нагрузки'}
+
+        # Имя: (нужен ли вход, нужная выборка, генератор запросов).
+        factories = {
+            'index': (False, None, get('index')),
+            'search': (False, 'words', search),
+            'post_create': (True, None, get('post_create')),
+            'group_list': (False, 'slugs', get('group_list', 'slugs', 'slug')),
+            'profile': (
+                False, 'usernames', get('profile', 'usernames', 'username')
+            ),
+            'post_detail': (
+                False, 'post_ids', get('post_detail', 'post_ids', 'post_id')
+            ),
+            'post_comments': (False, 'post_ids', get(
+                'post_comments', 'post_ids', 'post_id'
+            )),
+            'post_edit': (True, 'own_post_ids', get(
+                'post_edit', 'own_post_ids', 'post_id'
+            )),
+            'add_comment': (True, 'post_ids', add_comment),
+            'follow_index': (True, None, get('follow_index')),
+            'profile_follow': (True, 'usernames', get(
+                'profile_follow', 'usernames', 'username'
+            )),
+            'profile_unfollow': (True, 'usernames', get(
+                'profile_unfollow', 'usernames', 'username'
+            )),
+            'api_index': (False, None, get('api_index')),
+            'api_group_list': (False, 'slugs', get(
+                'api_group_list', 'slugs', 'slug'
+            )),
+            'api_profile': (False, 'usernames', get(
+                'api_profile', 'usernames', 'username'
+            )),
+            'api_post_detail': (False, 'post_ids', get(
+                'api_post_detail', 'post_ids', 'post_id'
+            )),
+            'api_follow_index': (True, None, get('api_follow_index')),
+        }
+        routes = {}
+        for pattern in urlpatterns:
+            name = pattern.name
+            if names and name not in names or (
+                name in WRITE_ROUTES and not writes
+            ):
+                continue
+            if name not in factories:
+                self.stderr.write(f'{name}: нет генератора запросов')
+                continue
+            login, sample, factory = factories[name]
+            if sample and not samples[sample]:
+                self.stderr.write(f'{name}: нет данных для запросов')
+                continue
+            routes[name] = (login, factory)
+        return routes
+
+    def run(self, login, make_request, requests, concurrency):
+        """Гоняет requests запросов в concurrency потоков."""
+        tasks = queue.Queue()
+        for _ in range(requests):
+            tasks.put(make_request())
+        # Вход один на маршрут и до потоков: параллельные force_login
+        # на SQLite упираются в блокировку таблицы сессий.
+        cookies = None
+        if login:
+            client = Client()
+            client.force_login(self.reader)
+            cookies = client.cookies
+        timings, statuses = [], []
+        threads = [
+            threading.Thread(
+                target=self.drive, args=(cookies, tasks, timings, statuses)
+            )
+            for _ in range(concurrency)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return summarize(timings, statuses, time.perf_counter() - start)
+
+    def drive(self, cookies, tasks, timings, statuses):
+        """Поток одного клиента: берет запросы, пока очередь не опустеет.
+
+        list.append атомарен, поэтому результаты пишутся без блокировки.
+        """
+        try:
+            client = Client(REMOTE_ADDR=REMOTE_ADDR)
+            if cookies:
+                client.cookies.update(cookies)
+            while True:
+                try:
+                    method, path, data = tasks.get_nowait()
+                except queue.Empty:
+                    return
+                start = time.perf_counter()
+                try:
+                    status = getattr(client, method)(path, data).status_code
+                except Exception:
+                    status = 500
+                timings.append(time.perf_counter() - start)
+                statuses.append(status)
+        finally:
+            connections.close_all()
+
+    def report(self, name, result):
+        if result['p50'] is None:
+            self.stdout.write(f'{name:<18} нет ни одного ответа')
+            return
+        self.stdout.write(
+            '{:<18} p50 {p50:7.1f} мс  p95 {p95:7.1f} мс  p99 {p99:7.1f} мс  '
+            '{throughput:7.1f} запр/с  ошибок {errors}'.format(name, **result)
+        )
+
+    def compare(self, path, results):
+        with open(path) as file:
+            previous = json.load(file)['routes']
+        self.stdout.write('Изменение относительно прошлого замера:')
+        for name, result in results.items():
+            before = previous.get(name)
+            if not (before and before['p95'] and result['p95']):
+                continue
+            self.stdout.write(
+                '{:<18} p95 {:+6.1f}%  пропускная {:+6.1f}%'.format(
+                    name,
+                    (result['p95'] / before['p95'] - 1) * 100,
+                    (result['throughput'] / before['throughput'] - 1) * 100,
+                )
+            )
@@ -0,0 +1,73 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from posts.models import ThumbnailJob
+from posts.thumbnails import (
+    enqueue_missing, process_job, requeue_stale_jobs
+)
+
+
+def process_job_in_thread(job_id):
+    close_old_connections()
+    try:
+        process_job(job_id)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Строит миниатюры картинок постов из очереди ThumbnailJob '
+        'в пуле потоков.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Размер пула потоков; 0 - обрабатывать в текущем потоке.'
+        )
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, а ждать новых заданий.'
+        )
+        parser.add_argument('--interval', type=float, default=1.0)
+        parser.add_argument(
+            '--enqueue-missing',
+            action='store_true',
+            help='Сначала поставить в очередь посты без нужных миниатюр: '
+                 'старые, из seed, после добавления размера в настройки.'
+        )
+
+    def handle(self, *args, workers, batch_size, loop, interval, **options):
+        if options['enqueue_missing']:
+            self.stdout.write(
+                f'Поставлено в очередь: {enqueue_missing(batch_size)}'
+            )
+        pool = ThreadPoolExecutor(max_workers=workers) if workers else None
+        run = pool.map if pool else map
+        task = process_job_in_thread if pool else process_job
+        processed = 0
+        try:
+            while True:
+                requeue_stale_jobs()
+                job_ids = list(ThumbnailJob.objects.filter(
+                    status=ThumbnailJob.PENDING
+                ).order_by('pk').values_list('pk', flat=True)[:batch_size])
+                # list() дожидается пачки и пробрасывает ошибки потоков.
+                list(run(task, job_ids))
+                processed += len(job_ids)
+                if len(job_ids) < batch_size:
+                    if not loop:
+                        break
+                    time.sleep(interval)
+        finally:
+            if pool:
+                pool.shutdown()
+        self.stdout.write(f'Обработано заданий: {processed}')
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from posts import search
+from posts.models import Post
+
+from .recount_counters import batches
+
+
+class Command(BaseCommand):
+    help = (
+        'Переиндексирует все посты для полнотекстового поиска пачками, '
+        'не очищая индекс целиком.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, batch_size, **options):
+        if not search.is_supported():
+            raise CommandError('Поиск FTS5 доступен только для SQLite.')
+        indexed = 0
+        for ids in batches(Post.objects.all(), batch_size):
+            with transaction.atomic():
+                search.index_posts(ids)
+            indexed += len(ids)
+        search.drop_orphans()
+        self.stdout.write(f'Проиндексировано постов: {indexed}')
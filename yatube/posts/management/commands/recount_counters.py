@@ -0,0 +1,87 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from posts.models import Comment, Follow, Post, User, UserStats
+
+STATS_FIELDS = ('posts_count', 'followers_count', 'following_count')
+
+
+def grouped_counts(queryset, field, ids):
+    counts = dict.fromkeys(ids, 0)
+    counts.update(
+        queryset.filter(**{f'{field}__in': ids}).values_list(field).annotate(
+            total=Count('pk')
+        ).order_by()
+    )
+    return counts
+
+
+def batches(queryset, batch_size):
+    """Первичные ключи queryset пачками по batch_size без OFFSET."""
+    last_pk = 0
+    while True:
+        ids = list(queryset.filter(pk__gt=last_pk).order_by('pk').values_list(
+            'pk', flat=True
+        )[:batch_size])
+        if not ids:
+            return
+        yield ids
+        last_pk = ids[-1]
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает денормализованные счетчики постов, комментариев '
+        'и подписок и исправляет расхождения.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, batch_size, **options):
+        users_fixed = sum(
+            self.repair_users(ids)
+            for ids in batches(User.objects.all(), batch_size)
+        )
+        posts_fixed = sum(
+            self.repair_posts(ids)
+            for ids in batches(Post.objects.all(), batch_size)
+        )
+        self.stdout.write(
+            f'Исправлено счетчиков: пользователей {users_fixed}, '
+            f'постов {posts_fixed}'
+        )
+
+    def repair_users(self, ids):
+        actual = {
+            'posts_count': grouped_counts(Post.objects, 'author_id', ids),
+            'followers_count': grouped_counts(
+                Follow.objects, 'author_id', ids
+            ),
+            'following_count': grouped_counts(Follow.objects, 'user_id', ids),
+        }
+        existing = UserStats.objects.in_bulk(ids)
+        missing, drifted = [], []
+        for user_id in ids:
+            stats = existing.get(user_id) or UserStats(user_id=user_id)
+            values = {field: actual[field][user_id] for field in STATS_FIELDS}
+            if all(getattr(stats, f) == v for f, v in values.items()):
+                continue
+            for field, value in values.items():
+                setattr(stats, field, value)
+            (drifted if user_id in existing else missing).append(stats)
+        UserStats.objects.bulk_create(missing)
+        UserStats.objects.bulk_update(drifted, STATS_FIELDS)
+        return len(missing) + len(drifted)
+
+    def repair_posts(self, ids):
+        actual = grouped_counts(Comment.objects, 'post_id', ids)
+        drifted = [
+            post
+            for post in Post.objects.filter(pk__in=ids).only('comments_count')
+            if post.comments_count != actual[post.pk]
+        ]
+        for post in drifted:
+            post.comments_count = actual[post.pk]
+        Post.objects.bulk_update(drifted, ('comments_count',))
+        return len(drifted)
@@ -0,0 +1,246 @@
+import os
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import accumulate
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+from PIL import Image
+
+from posts import search, thumbnails, timeline
+from posts.models import Comment, Follow, Group, Post, User
+
+from .recount_counters import batches
+
+IMAGE_DIR = 'posts/seed'
+IMAGE_SIZES = ((1600, 900), (1300, 700), (960, 540), (800, 800))
+# Тексты берутся из заранее созданного набора: Faker на каждый пост
+# был бы медленнее самих вставок.
+TEXT_POOL_SIZE = 1000
+
+
+@contextmanager
+def keep_dates(*models):
+    """Отключает auto_now и auto_now_add, чтобы bulk_create сохранил
+    заданные даты."""
+    fields = [
+        field for model in models for field in model._meta.fields
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def skewed(count, skew):
+    """Накопленные веса Ципфа: первые элементы выпадают чаще всего."""
+    return list(accumulate(1 / (rank + 1) ** skew for rank in range(count)))
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет базу правдоподобными данными для замеров: '
+        'пользователи, группы, посты с картинками, комментарии и '
+        'подписки с перекошенным распределением популярности. После '
+        'вставки пересчитывает счетчики, ленты подписок и поисковый индекс.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument(
+            '--follows', type=int, default=20,
+            help='Среднее число подписок пользователя.'
+        )
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Показатель Ципфа для авторов, подписок и комментариев.'
+        )
+        parser.add_argument('--days', type=int, default=365)
+        parser.add_argument('--images', type=int, default=20)
+        parser.add_argument('--image-ratio', type=float, default=0.2)
+        parser.add_argument('--password', default='password')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int)
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.batch_size = options['batch_size']
+        self.random = random.Random(options['seed'])
+        self.faker = Faker('ru_RU')
+        self.faker.seed_instance(options['seed'])
+        self.now = timezone.now()
+        with keep_dates(Post, Comment):
+            users = self.create_users(options['users'])
+            groups = self.create_groups(options['groups'])
+            images = self.create_images(options['images'])
+            posts = self.create_posts(
+                options['posts'], users, groups, images
+            )
+            self.create_comments(options['comments'], users, posts)
+            self.create_follows(users)
+        self.rebuild()
+        self.stdout.write(
+            f'Создано: пользователей {len(users)}, групп {len(groups)}, '
+            f'постов {len(posts)}, комментариев {options["comments"]}'
+        )
+
+    def insert(self, model, objects, **kwargs):
+        """bulk_create пачками; возвращает id созданных строк.
+
+        SQLite не возвращает id из bulk_create, но пишет сюда только
+        эта команда: новые строки - все, чей id больше прежнего максимума.
+        """
+        start = model.objects.aggregate(last=Max('pk'))['last'] or 0
+        batch = []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) == self.batch_size:
+                model.objects.bulk_create(batch, **kwargs)
+                batch = []
+        model.objects.bulk_create(batch, **kwargs)
+        return list(model.objects.filter(pk__gt=start).order_by(
+            'pk'
+        ).values_list('pk', flat=True))
+
+    def moment(self):
+        return self.now - timedelta(
+            seconds=self.random.uniform(0, self.options['days'] * 86400)
+        )
+
+    def create_users(self, count):
+        password = make_password(self.options['password'])
+        suffix = self.random.randrange(10 ** 6)
+        return self.insert(User, (
+            User(
+                username=f'{self.faker.user_name()}_{suffix}_{i}',
+                first_name=self.faker.first_name(),
+                last_name=self.faker.last_name(),
+                password=password,
+            )
+            for i in range(count)
+        ))
+
+    def create_groups(self, count):
+        suffix = self.random.randrange(10 ** 6)
+        return self.insert(Group, (
+            Group(
+                title=self.faker.word().capitalize(),
+                slug=f'group-{suffix}-{i}',
+                description=self.faker.paragraph(),
+            )
+            for i in range(count)
+        ))
+
+    def create_images(self, count):
+        """Набор картинок разных размеров, общий для всех постов."""
+        directory = os.path.join(settings.MEDIA_ROOT, IMAGE_DIR)
+        os.makedirs(directory, exist_ok=True)
+        images = []
+        for i in range(count):
+            size = IMAGE_SIZES[i % len(IMAGE_SIZES)]
+            name = f'{IMAGE_DIR}/seed-{i}.jpg'
+            Image.new('RGB', size, tuple(
+                self.random.randrange(256) for _ in range(3)
+            )).save(os.path.join(settings.MEDIA_ROOT, name), 'JPEG')
+            images.append((name, *size))
+        return images
+
+    def create_posts(self, count, users, groups, images):
+        texts = [
+            self.faker.paragraph(nb_sentences=self.random.randint(1, 8))
+            for _ in range(TEXT_POOL_SIZE)
+        ]
+        authors = skewed(len(users), self.options['skew'])
+        ratio = self.options['image_ratio'] if images else 0
+
+        def post():
+            created = self.moment()
+            image, width, height = (
+                self.random.choice(images)
+                if self.random.random() < ratio else ('', None, None)
+            )
+            return Post(
+                text=self.random.choice(texts),
+                author_id=self.random.choices(users, cum_weights=authors)[0],
+                group_id=(
+                    self.random.choice(groups)
+                    if groups and self.random.random() < 0.7 else None
+                ),
+                image=image,
+                image_width=width,
+                image_height=height,
+                created=created,
+                updated=created,
+            )
+        return self.insert(Post, (post() for _ in range(count)))
+
+    def create_comments(self, count, users, posts):
+        if not posts:
+            return
+        texts = [
+            self.faker.sentence()[:200] for _ in range(TEXT_POOL_SIZE)
+        ]
+        # Популярные посты - случайные, а не самые старые.
+        order = posts[:]
+        self.random.shuffle(order)
+        weights = skewed(len(order), self.options['skew'])
+
+        def comment():
+            created = self.moment()
+            return Comment(
+                post_id=self.random.choices(order, cum_weights=weights)[0],
+                author_id=self.random.choice(users),
+                text=self.random.choice(texts),
+                created=created,
+                updated=created,
+            )
+        self.insert(Comment, (comment() for _ in range(count)))
+
+    def create_follows(self, users):
+        authors = skewed(len(users), self.options['skew'])
+        average = self.options['follows']
+
+        def follows():
+            for user_id in users:
+                count = min(
+                    self.random.randint(0, average * 2), len(users) - 1
+                )
+                followed = set(self.random.choices(
+                    users, cum_weights=authors, k=count
+                ))
+                followed.discard(user_id)
+                for author_id in followed:
+                    yield Follow(user_id=user_id, author_id=author_id)
+        self.insert(Follow, follows(), ignore_conflicts=True)
+
+    def rebuild(self):
+        """Все, что при обычном save() делают сигналы."""
+        call_command('recount_counters', stdout=self.stdout)
+        for ids in batches(
+            User.objects.filter(follower__isnull=False).distinct(),
+            self.batch_size // 10 or 1
+        ):
+            with transaction.atomic():
+                timeline.rebuild(ids)
+        if search.is_supported():
+            call_command('rebuild_search_index', stdout=self.stdout)
+        # Миниатюры картинок построит process_thumbnails.
+        thumbnails.enqueue_missing(self.batch_size)
+        cache.clear()
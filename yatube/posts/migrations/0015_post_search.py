@@ -0,0 +1,37 @@
+# Generated by Django 2.2.16 on 2026-10-17 06:12
+
+from django.db import migrations
+
+SEARCH_TABLE = 'posts_post_search'
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    # unicode61 приводит кириллицу к нижнему регистру, а remove_diacritics
+    # уравнивает "ё" и "е"; префиксные индексы ускоряют поиск по основам.
+    schema_editor.execute(
+        f'CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5('
+        "text, tokenize = 'unicode61 remove_diacritics 2', "
+        "prefix = '2 3 4')"
+    )
+    schema_editor.execute(
+        f'INSERT INTO {SEARCH_TABLE} (rowid, text) '
+        'SELECT id, text FROM posts_post'
+    )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_image_size'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 2.2.16 on 2026-10-17 04:52
+
+from django.db import migrations, models
+
+
+def copy_created(apps, schema_editor):
+    for model in ('Post', 'Comment'):
+        apps.get_model('posts', model).objects.update(
+            updated=models.F('created')
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_post_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, verbose_name='Дата изменения'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, verbose_name='Дата изменения'),
+        ),
+        migrations.RunPython(copy_created, migrations.RunPython.noop),
+    ]
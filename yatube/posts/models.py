@@ -6,6 +6,12 @@ from core.models import DateAbstractModel
 User = get_user_model()
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты со всем, что выводится в карточке ленты."""
+        return self.select_related('author', 'group')
+
+
 class Post(DateAbstractModel):
     text = models.TextField(
         'Текст поста',
@@ -31,6 +37,38 @@ class Post(DateAbstractModel):
         upload_to='posts/',
         blank=True
     )
+    image_width = models.PositiveIntegerField(
+        'Ширина картинки',
+        blank=True,
+        null=True,
+        editable=False
+    )
+    image_height = models.PositiveIntegerField(
+        'Высота картинки',
+        blank=True,
+        null=True,
+        editable=False
+    )
+    comments_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False
+    )
+
+    objects = PostQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=('-created', '-id'), name='post_feed_idx'),
+            models.Index(
+                fields=('author', '-created', '-id'),
+                name='post_author_feed_idx'
+            ),
+            models.Index(
+                fields=('group', '-created', '-id'),
+                name='post_group_feed_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
@@ -75,6 +113,16 @@ class Comment(DateAbstractModel):
     )
     text = models.TextField('Комментарий', max_length=200)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=('post', '-created', '-id'),
+                name='comment_post_feed_idx'
+            ),
+            # Для date_hierarchy и сортировки списка в админке.
+            models.Index(fields=('-created', '-id'), name='comment_feed_idx'),
+        ]
+
     def __str__(self):
         return self.text[:15]
 
@@ -93,5 +141,107 @@ class Follow(models.Model):
         related_name='following'
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'author'),
+                name='unique_follow'
+            ),
+        ]
+
     def __str__(self):
         return f'Пользователь "{self.user}" подписан на "{self.author}"'
+
+
+class UserStats(models.Model):
+    """Счетчики пользователя, которые иначе пришлось бы считать COUNT(*)."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        verbose_name='Пользователь',
+        related_name='stats'
+    )
+    posts_count = models.PositiveIntegerField('Количество постов', default=0)
+    followers_count = models.PositiveIntegerField(
+        'Количество подписчиков',
+        default=0
+    )
+    following_count = models.PositiveIntegerField(
+        'Количество подписок',
+        default=0
+    )
+
+    def __str__(self):
+        return f'Счетчики пользователя "{self.user_id}"'
+
+
+class TimelineEntry(models.Model):
+    """Пост в материализованной ленте подписок читателя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Читатель',
+        related_name='timeline'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        verbose_name='Пост',
+        related_name='timeline_entries'
+    )
+    created = models.DateTimeField('Дата публикации поста')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'post'),
+                name='unique_timeline_entry'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=('user', '-created', '-post'),
+                name='timeline_user_feed_idx'
+            ),
+        ]
+
+
+class ThumbnailJob(models.Model):
+    """Задание на подготовку миниатюр картинки поста."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        verbose_name='Пост',
+        related_name='thumbnail_jobs'
+    )
+    image = models.CharField('Картинка', max_length=100)
+    status = models.CharField(
+        'Статус',
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+        db_index=True
+    )
+    created = models.DateTimeField(
+        'Дата постановки в очередь',
+        auto_now_add=True
+    )
+    started = models.DateTimeField(
+        'Дата начала обработки',
+        blank=True,
+        null=True
+    )
+
+    def __str__(self):
+        return f'Миниатюры "{self.image}": {self.get_status_display()}'
@@ -0,0 +1,156 @@
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from .models import Post
+
+SEARCH_TABLE = 'posts_post_search'
+MAX_TERMS = 10
+WORD = re.compile(r'\w+')
+# Стеммер Портера (Snowball) для русского: основу слова ищем по
+# префиксу, поэтому "постов" и "посты" сводятся к "пост"*.
+VOWELS = 'аеиоуыэюя'
+RV = re.compile(f'^(.*?[{VOWELS}])(.*)$')
+PERFECTIVE_GERUND = re.compile(
+    r'((ив|ивши|ившись|ыв|ывши|ывшись)|((?<=[ая])(в|вши|вшись)))$'
+)
+REFLEXIVE = re.compile(r'(с[яь])$')
+ADJECTIVE = re.compile(
+    r'(ее|ие|ые|ое|ими|ыми|ей|ий|ый|ой|ем|им|ым|ом|его|ого|ему|ому|их|ых|'
+    r'ую|юю|ая|яя|ою|ею)$'
+)
+PARTICIPLE = re.compile(r'((ивш|ывш|ующ)|((?<=[ая])(ем|нн|вш|ющ|щ)))$')
+VERB = re.compile(
+    r'((ила|ыла|ена|ейте|уйте|ите|или|ыли|ей|уй|ил|ыл|им|ым|ен|ило|ыло|'
+    r'ено|ят|ует|уют|ит|ыт|ены|ить|ыть|ишь|ую|ю)|'
+    r'((?<=[ая])(ла|на|ете|йте|ли|й|л|ем|н|ло|но|ет|ют|ны|ть|ешь|нно)))$'
+)
+NOUN = re.compile(
+    r'(а|ев|ов|ие|ье|е|иями|ями|ами|еи|ии|и|ией|ей|ой|ий|й|иям|ям|ием|'
+    r'ем|ам|ом|о|у|ах|иях|ях|ы|ь|ию|ью|ю|ия|ья|я)$'
+)
+# Словообразовательный суффикс отрезается только в области R2.
+DERIVATIONAL = re.compile(f'[^{VOWELS}][{VOWELS}].*[^{VOWELS}]ость?$')
+SUPERLATIVE = re.compile(r'(ейше|ейш)$')
+MIN_STEM = 2
+
+
+def stem(word):
+    """Основа слова по Snowball; нерусские и короткие слова - как есть."""
+    word = word.replace('ё', 'е')
+    found = RV.match(word)
+    if not found:
+        return word
+    start, rv = found.groups()
+    cut = PERFECTIVE_GERUND.sub('', rv, 1)
+    if cut == rv:
+        rv = REFLEXIVE.sub('', rv, 1)
+        cut = ADJECTIVE.sub('', rv, 1)
+        if cut != rv:
+            cut = PARTICIPLE.sub('', cut, 1)
+        else:
+            cut = VERB.sub('', rv, 1)
+            if cut == rv:
+                cut = NOUN.sub('', rv, 1)
+    rv = re.sub('и$', '', cut)
+    if DERIVATIONAL.search(rv):
+        rv = re.sub('ость?$', '', rv)
+    if rv.endswith('ь'):
+        rv = rv[:-1]
+    else:
+        rv = re.sub('нн$', 'н', SUPERLATIVE.sub('', rv, 1))
+    result = start + rv
+    return result if len(result) >= MIN_STEM else word
+
+
+class MatchedIds(RawSQL):
+    """rowid подходящих под запрос постов для фильтра pk__in.
+
+    Lookup IN в Django 2.2 сам берет выражение в скобки, а RawSQL
+    добавляет вторые: IN ((SELECT ...)) SQLite считает скалярным
+    подзапросом и оставляет только первую строку.
+    """
+
+    def as_sql(self, compiler, connection):
+        return self.sql, self.params
+
+
+def is_supported():
+    return connection.vendor == 'sqlite'
+
+
+def match_query(text):
+    """Запрос FTS5 из слов пользователя: все основы должны встретиться."""
+    stems = (
+        stem(word)
+        for word in WORD.findall(text.lower())[:MAX_TERMS]
+    )
+    return ' '.join(f'"{stem}"*' for stem in stems)
+
+
+def index_posts(post_ids):
+    """Заново индексирует посты post_ids (их текст берется из таблицы)."""
+    if not is_supported() or not post_ids:
+        return
+    placeholders = ', '.join(['%s'] * len(post_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({placeholders})',
+            post_ids
+        )
+        cursor.execute(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, text) '
+            f'SELECT id, text FROM {Post._meta.db_table} '
+            f'WHERE id IN ({placeholders})',
+            post_ids
+        )
+
+
+def unindex_post(post_id):
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [post_id]
+        )
+
+
+def drop_orphans():
+    """Убирает из индекса посты, удаленные в обход сигналов."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {SEARCH_TABLE} WHERE rowid NOT IN '
+            f'(SELECT id FROM {Post._meta.db_table})'
+        )
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')"
+        )
+
+
+def filter_posts(queryset, text):
+    """Посты queryset, подходящие под запрос, без ранжирования."""
+    match = match_query(text)
+    if not match:
+        return queryset.none()
+    if not is_supported():
+        return queryset.filter(text__icontains=text)
+    return queryset.filter(pk__in=MatchedIds(
+        f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s',
+        [match]
+    ))
+
+
+def search_posts(queryset, text):
+    """Посты queryset, подходящие под запрос, от самых релевантных (bm25)."""
+    match = match_query(text)
+    if not match or not is_supported():
+        return filter_posts(queryset, text).order_by('-created', '-id')
+    rank = RawSQL(
+        f'SELECT rank FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s '
+        f'AND rowid = {Post._meta.db_table}.id',
+        [match]
+    )
+    return filter_posts(queryset, text).annotate(rank=rank).order_by(
+        'rank', '-created', '-id'
+    )
@@ -0,0 +1,114 @@
+from django.core.files.images import get_image_dimensions
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.cache import bump_generations
+
+from . import counters, search, thumbnails, timeline
+from .models import Comment, Follow, Group, Post, User
+from .utils import GROUPS_SCOPE, post_cache_scopes
+
+
+@receiver(pre_save, sender=Post)
+def post_before_edit(sender, instance, **kwargs):
+    if instance.pk:
+        instance._previous_group_slug, instance._previous_image = (
+            Post.objects.filter(pk=instance.pk).values_list(
+                'group__slug', 'image'
+            ).first() or (None, '')
+        )
+
+
+@receiver(pre_save, sender=Post)
+def store_image_size(sender, instance, **kwargs):
+    # Размеры читаются из загружаемого файла, пока он еще в памяти,
+    # чтобы потом никогда не открывать исходник при выводе.
+    if not instance.image:
+        instance.image_width = instance.image_height = None
+    elif not instance.image._committed:
+        instance.image_width, instance.image_height = get_image_dimensions(
+            instance.image.file
+        )
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.change_user_counter(instance.author_id, 'posts_count', 1)
+        timeline.fan_out(instance)
+    previous_image = getattr(instance, '_previous_image', '')
+    if (instance.image.name or '') != (previous_image or ''):
+        thumbnails.image_replaced(instance, previous_image)
+    search.index_posts([instance.pk])
+    bump_generations(*post_cache_scopes(instance))
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    counters.change_user_counter(instance.author_id, 'posts_count', -1)
+    search.unindex_post(instance.pk)
+    bump_generations(*post_cache_scopes(instance))
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    if created:
+        counters.change_comments_count(instance.post_id, 1)
+    bump_generations(f'post-{instance.post_id}')
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.change_comments_count(instance.post_id, -1)
+    bump_generations(f'post-{instance.post_id}')
+
+
+def bump_follow_scopes(follow):
+    # Счетчики подписок и кнопка подписки выводятся в профилях обоих.
+    bump_generations(*(
+        f'follows-{username}' for username in User.objects.filter(
+            pk__in=(follow.user_id, follow.author_id)
+        ).values_list('username', flat=True)
+    ))
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        counters.change_user_counter(instance.user_id, 'following_count', 1)
+        counters.change_user_counter(instance.author_id, 'followers_count', 1)
+        timeline.backfill(instance.user_id, instance.author_id)
+        bump_follow_scopes(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    counters.change_user_counter(instance.user_id, 'following_count', -1)
+    counters.change_user_counter(instance.author_id, 'followers_count', -1)
+    timeline.drop(instance.user_id, instance.author_id)
+    bump_follow_scopes(instance)
+
+
+def group_scopes(slugs):
+    # Название группы выводится в карточках ее постов во всех лентах.
+    return (GROUPS_SCOPE, *(f'group-{slug}' for slug in slugs if slug))
+
+
+@receiver(pre_save, sender=Group)
+def group_before_edit(sender, instance, **kwargs):
+    if instance.pk:
+        instance._previous_slug = Group.objects.filter(
+            pk=instance.pk
+        ).values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, **kwargs):
+    if not created:
+        previous_slug = getattr(instance, '_previous_slug', None)
+        bump_generations(*group_scopes((instance.slug, previous_slug)))
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    bump_generations(*group_scopes((instance.slug,)))
@@ -0,0 +1,63 @@
+import hashlib
+
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from core import metrics
+from posts.thumbnails import prefetch_thumbnails
+
+register = template.Library()
+
+CARD_KEY = 'post-card:{}:{}'
+
+
+def card_version(post, *options):
+    """Меняется при правке поста, смене картинки или ее миниатюр,
+    переименовании группы или автора."""
+    author, group = post.author, post.group
+    return hashlib.md5(':'.join(map(str, (
+        post.updated.timestamp(),
+        author.username,
+        author.get_full_name(),
+        group and group.slug,
+        group and group.title,
+        *options,
+    ))).encode()).hexdigest()
+
+
+@register.simple_tag
+def post_cards(posts, geometry, show_group=True):
+    """HTML карточек постов страницы: из кеша одним get_many, промахи -
+    рендером includes/post_card.html.
+
+    {% post_cards page_obj "960x339" as cards %}
+    """
+    posts = list(posts)
+    keys = [
+        CARD_KEY.format(post.pk, card_version(post, geometry, show_group))
+        for post in posts
+    ]
+    cards = cache.get_many(keys)
+    missing = [
+        (post, key) for post, key in zip(posts, keys) if key not in cards
+    ]
+    metrics.inc('yatube_cache_requests_total', len(cards),
+                cache='post_card', result='hit')
+    metrics.inc('yatube_cache_requests_total', len(missing),
+                cache='post_card', result='miss')
+    if missing:
+        prefetch_thumbnails([post for post, _ in missing], geometry)
+        rendered = {
+            key: render_to_string('includes/post_card.html', {
+                'post': post,
+                'geometry': geometry,
+                'show_group': show_group,
+            })
+            for post, key in missing
+        }
+        cache.set_many(rendered, settings.POST_CARD_TIMEOUT)
+        cards.update(rendered)
+    return [mark_safe(cards[key]) for key in keys]
@@ -0,0 +1,22 @@
+from django import template
+
+from posts.thumbnails import cached_thumbnail
+
+register = template.Library()
+
+
+@register.inclusion_tag('includes/post_image.html')
+def post_image(post, geometry):
+    """Готовая миниатюра картинки поста или заглушка того же размера."""
+    width, height = geometry.split('x')
+    thumbnails = getattr(post, 'thumbnails', {})
+    if geometry in thumbnails:
+        thumbnail = thumbnails[geometry]
+    else:
+        thumbnail = cached_thumbnail(post.image, geometry)
+    return {
+        'image': post.image,
+        'thumbnail': thumbnail,
+        'width': width,
+        'height': height,
+    }
@@ -0,0 +1,139 @@
+from unittest import mock
+
+from django.contrib.admin import helpers
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.cache import get_generations
+from core.paginator import EstimatedCountPaginator
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class AdminTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='password'
+        )
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='-'
+        )
+        cls.target = Group.objects.create(
+            title='Другая', slug='target', description='-'
+        )
+        for i in range(3):
+            post = Post.objects.create(
+                text=f'text {i}', author=cls.author, group=cls.group
+            )
+            Comment.objects.create(post=post, author=cls.admin, text='-')
+        Follow.objects.create(user=cls.admin, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def test_changelists_skip_exact_counts(self):
+        """Список не считает строки COUNT(*) по всей таблице."""
+        for model in ('post', 'comment', 'follow'):
+            url = reverse(f'admin:posts_{model}_changelist')
+            with self.subTest(model=model), CaptureQueriesContext(
+                connection
+            ) as queries:
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertFalse([
+                    query['sql'] for query in queries
+                    if 'COUNT(' in query['sql']
+                    and f'"posts_{model}"' in query['sql']
+                    and 'LIMIT' not in query['sql']
+                ])
+
+    def test_change_forms_do_not_list_all_users(self):
+        post = Post.objects.filter(author=self.author).first()
+        response = self.client.get(
+            reverse('admin:posts_post_change', args=(post.pk,))
+        )
+        self.assertContains(response, 'admin-autocomplete')
+        self.assertNotContains(
+            response, f'<option value="{self.admin.pk}">'
+        )
+
+    def test_foreign_key_search(self):
+        for model, query in (
+            ('comment', 'admin'), ('follow', 'author'), ('post', 'text')
+        ):
+            with self.subTest(model=model):
+                response = self.client.get(
+                    reverse(f'admin:posts_{model}_changelist'), {'q': query}
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertGreater(response.context['cl'].result_count, 0)
+
+    def test_filtered_count_is_bounded(self):
+        queryset = Post.objects.filter(author=self.author).order_by('pk')
+        paginator = EstimatedCountPaginator(queryset, 10)
+        self.assertEqual(paginator.count, 3)
+        self.assertFalse(paginator.capped)
+        with mock.patch('core.paginator.COUNT_LIMIT', 2):
+            paginator = EstimatedCountPaginator(queryset, 10)
+            self.assertEqual(paginator.count, 2)
+            self.assertTrue(paginator.capped)
+
+    def test_count_ignores_deleted_rows(self):
+        """Без статистики PostgreSQL удаленные строки не считаются."""
+        kept = Follow.objects.create(user=self.author, author=self.admin)
+        Follow.objects.exclude(pk=kept.pk).delete()
+        paginator = EstimatedCountPaginator(Follow.objects.order_by('pk'), 10)
+        self.assertEqual(paginator.count, Follow.objects.count())
+
+    def test_capped_count_is_shown(self):
+        with mock.patch('core.paginator.COUNT_LIMIT', 2):
+            response = self.client.get(
+                reverse('admin:posts_post_changelist')
+            )
+        self.assertContains(response, 'не меньше 2 ')
+        response = self.client.get(reverse('admin:posts_post_changelist'))
+        self.assertNotContains(response, 'не меньше')
+
+    def test_move_to_group_is_single_update(self):
+        posts = Post.objects.filter(author=self.author)
+        # Страницы постов и профилей зависят от groups: ни постов, ни
+        # авторов действие не перебирает.
+        scopes = ('index', 'groups', 'group-group', 'group-target')
+        before = get_generations(*scopes)
+        selected = list(posts.values_list('pk', flat=True))
+        detail = reverse('posts:post_detail', args=(selected[0],))
+        self.assertNotContains(self.client.get(detail), 'Другая')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse('admin:posts_post_changelist'),
+                {
+                    'action': 'move_to_group',
+                    'index': 0,
+                    'group': self.target.pk,
+                    helpers.ACTION_CHECKBOX_NAME: selected,
+                }
+            )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            set(posts.values_list('group', flat=True)), {self.target.pk}
+        )
+        self.assertEqual(len([
+            query for query in queries
+            if query['sql'].startswith('UPDATE "posts_post"')
+        ]), 1)
+        self.assertFalse([
+            query['sql'] for query in queries
+            if query['sql'].startswith('SELECT "posts_post"."id"')
+            or 'auth_user"."username' in query['sql']
+            and '"posts_post"' in query['sql']
+        ])
+        after = get_generations(*scopes)
+        for old, new in zip(before, after):
+            self.assertGreater(new, old)
+        self.assertContains(self.client.get(detail), 'Другая')
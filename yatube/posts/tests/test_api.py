@@ -0,0 +1,113 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой'
+        )
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'Пост {i}', author=cls.author, group=cls.group
+            )
+            for i in range(12)
+        ]
+        Comment.objects.create(
+            post=cls.posts[-1], author=cls.reader, text='Комментарий'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def walk(self, url):
+        """Тексты всех постов ленты, пройденной по курсорам."""
+        texts = []
+        while url:
+            data = self.client.get(url).json()
+            texts += [post['text'] for post in data['results']]
+            url = data['next']
+        return texts
+
+    def test_feeds_walk_all_posts_by_cursor(self):
+        expected = [post.text for post in reversed(self.posts)]
+        self.client.force_login(self.reader)
+        for name, kwargs in (
+            ('posts:api_index', {}),
+            ('posts:api_group_list', {'slug': 'group'}),
+            ('posts:api_profile', {'username': 'author'}),
+            ('posts:api_follow_index', {}),
+        ):
+            with self.subTest(name=name):
+                self.assertEqual(
+                    self.walk(reverse(name, kwargs=kwargs)), expected
+                )
+
+    def test_post_serialization(self):
+        post = self.posts[-1]
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                reverse('posts:api_post_detail', kwargs={'post_id': post.id})
+            )
+        data = response.json()
+        self.assertEqual(data['post']['author'], {
+            'username': 'author', 'first_name': 'Лев', 'last_name': 'Толстой'
+        })
+        self.assertEqual(
+            data['post']['group'], {'slug': 'group', 'title': 'Группа'}
+        )
+        self.assertIsNone(data['post']['image'])
+        self.assertEqual(data['post']['comments_count'], 1)
+        self.assertEqual(data['comments']['results'][0]['author'], 'reader')
+
+    def test_etag_returns_not_modified_until_feed_changes(self):
+        url = reverse('posts:api_index')
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(text='Новый', author=self.author)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_feed_rows_have_no_comment_counts(self):
+        """Комментарий не сдвигает поколение ленты, поэтому счетчика
+        комментариев в ней нет: 304 не отдает устаревшее число."""
+        url = reverse('posts:api_index')
+        response = self.client.get(url)
+        self.assertNotIn('comments_count', response.json()['results'][0])
+        Comment.objects.create(
+            post=self.posts[0], author=self.reader, text='Еще'
+        )
+        self.assertEqual(self.client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        ).status_code, 304)
+        detail = reverse(
+            'posts:api_post_detail', kwargs={'post_id': self.posts[0].id}
+        )
+        self.assertEqual(
+            self.client.get(detail).json()['post']['comments_count'], 1
+        )
+
+    def test_errors(self):
+        self.assertEqual(self.client.get(reverse(
+            'posts:api_group_list', kwargs={'slug': 'missing'}
+        )).status_code, 404)
+        self.assertEqual(self.client.get(
+            reverse('posts:api_index'), {'after': 'broken'}
+        ).status_code, 400)
+        self.assertEqual(
+            self.client.get(reverse('posts:api_follow_index')).status_code,
+            401
+        )
@@ -0,0 +1,34 @@
+from django.test import SimpleTestCase
+
+from posts.benchmarks import regressions
+
+THRESHOLDS = {'time': 0.5, 'queries': 0, 'memory': 0.25}
+BASELINE = {'time': 10.0, 'queries': 4, 'memory': 100.0, 'calibration': 20.0}
+
+
+class RegressionTests(SimpleTestCase):
+    def check(self, **result):
+        return regressions(dict(BASELINE, **result), BASELINE, THRESHOLDS)
+
+    def test_growth_within_thresholds_passes(self):
+        self.assertEqual(self.check(time=14.9, memory=124.0), [])
+
+    def test_each_metric_is_checked(self):
+        for metric, value in (
+            ('time', 15.1), ('queries', 5), ('memory', 126.0)
+        ):
+            with self.subTest(metric=metric):
+                found = self.check(**{metric: value})
+                self.assertEqual(len(found), 1)
+                self.assertTrue(found[0].startswith(metric))
+
+    def test_time_is_scaled_by_calibration(self):
+        """На вдвое более медленной машине вдвое большее время - норма."""
+        self.assertEqual(self.check(time=20.0, calibration=40.0), [])
+        self.assertEqual(len(self.check(time=20.0)), 1)
+
+    def test_small_time_differences_are_noise(self):
+        baseline = dict(BASELINE, time=0.5)
+        self.assertEqual(
+            regressions(dict(baseline, time=1.4), baseline, THRESHOLDS), []
+        )
@@ -0,0 +1,146 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.cache_backends import SQLiteCache
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            text='text', author=cls.author, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_hit_skips_database_and_carries_surrogate_keys(self):
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        response = self.guest_client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertEqual(
+            set(response['Surrogate-Key'].split()),
+            {f'post-{self.post.id}', 'author-author', 'groups'}
+        )
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.assertEqual(
+            self.guest_client.get(reverse('about:tech'))['Surrogate-Key'],
+            'about'
+        )
+
+    def test_changes_purge_only_affected_pages(self):
+        detail = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        group = reverse('posts:group_list', kwargs={'slug': 'group'})
+        other = Post.objects.create(text='other', author=self.author)
+        other_detail = reverse(
+            'posts:post_detail', kwargs={'post_id': other.id}
+        )
+        for url in (detail, group, other_detail):
+            self.guest_client.get(url)
+        Comment.objects.create(post=self.post, author=self.author, text='new')
+        self.assertContains(self.guest_client.get(detail), 'new')
+        self.assertEqual(
+            self.guest_client.get(other_detail)['X-Page-Cache'], 'hit'
+        )
+
+        profile = reverse('posts:profile', kwargs={'username': 'author'})
+        self.guest_client.get(profile)
+        Post.objects.bulk_create(
+            Post(text=f'post {i}', author=self.author, group=self.group)
+            for i in range(20)
+        )
+        self.group.title = 'Новое название'
+        # Сдвигаются поколения groups и group-<slug>, посты не читаются.
+        with self.assertNumQueries(2):
+            self.group.save()
+        for url in (group, detail, profile, reverse('posts:index')):
+            with self.subTest(url=url):
+                self.assertContains(
+                    self.guest_client.get(url), 'Новое название'
+                )
+
+    def test_users_share_cached_body_with_own_holes(self):
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        self.assertEqual(self.guest_client.get(url)['X-Page-Cache'], 'miss')
+        author = Client()
+        author.force_login(self.author)
+        reader = Client()
+        reader.force_login(User.objects.create_user(username='reader'))
+
+        response = author.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.assertContains(response, 'Редактировать запись')
+        self.assertContains(response, 'name="csrfmiddlewaretoken"')
+        self.assertContains(response, 'Пользователь: author')
+        self.assertNotContains(response, '<!--hole:')
+        self.assertIn(settings.CSRF_COOKIE_NAME, response.cookies)
+
+        response = reader.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.assertNotContains(response, 'Редактировать запись')
+        self.assertContains(response, 'Добавить комментарий')
+        self.assertContains(response, 'Пользователь: reader')
+        self.assertFalse(response.has_header('Last-Modified'))
+        self.assertNotEqual(response['ETag'], author.get(url)['ETag'])
+
+        response = self.guest_client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.assertContains(response, 'Войти')
+        self.assertNotContains(response, 'Добавить комментарий')
+        self.assertNotContains(response, 'csrfmiddlewaretoken')
+
+    def test_follow_button_is_filled_per_user(self):
+        url = reverse('posts:profile', kwargs={'username': 'author'})
+        follower = User.objects.create_user(username='follower')
+        Follow.objects.create(user=follower, author=self.author)
+        self.guest_client.get(url)
+        client = Client()
+        client.force_login(follower)
+        response = client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.assertContains(response, 'Отписаться')
+        self.assertContains(self.guest_client.get(url), 'Подписаться')
+
+
+class SQLitePageCacheTests(PageCacheTests):
+    """Те же сценарии на SQLiteCache, с которым работает сервер.
+
+    Остальные тесты идут на LocMemCache, см. settings.TESTING.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.mkdtemp()
+        cls.cache_settings = override_settings(CACHES={'default': {
+            'BACKEND': 'core.cache_backends.SQLiteCache',
+            'LOCATION': os.path.join(cls.tmp, 'cache.sqlite3'),
+        }})
+        cls.cache_settings.enable()
+        # Django 2.2 не сбрасывает созданные бэкенды при смене CACHES.
+        caches._caches.caches = {}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.cache_settings.disable()
+        caches._caches.caches = {}
+        shutil.rmtree(cls.tmp, ignore_errors=True)
+
+    def test_backend_is_sqlite(self):
+        self.assertIsInstance(caches['default'], SQLiteCache)
@@ -0,0 +1,47 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from posts.models import Group, Post, User
+from posts.templatetags.post_cards import post_cards
+
+
+class PostCardsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='-'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            text='Первый', author=self.user, group=self.group
+        )
+
+    def cards(self):
+        return post_cards(
+            Post.objects.for_feed().filter(pk=self.post.pk), '960x339'
+        )
+
+    def test_card_is_cached_until_new_version(self):
+        self.assertIn('Первый', self.cards()[0])
+        # update() не меняет версию: отдается закешированная карточка.
+        Post.objects.filter(pk=self.post.pk).update(text='Тайком')
+        self.assertIn('Первый', self.cards()[0])
+        self.post.text = 'Второй'
+        self.post.save()
+        self.assertIn('Второй', self.cards()[0])
+
+    def test_group_rename_changes_card(self):
+        self.assertIn('Группа', self.cards()[0])
+        self.group.title = 'Новая группа'
+        self.group.save()
+        self.assertIn('Новая группа', self.cards()[0])
+
+    def test_updated_is_set_on_save(self):
+        updated = self.post.updated
+        self.post.save()
+        self.assertGreater(self.post.updated, updated)
+        self.assertGreaterEqual(updated, self.post.created)
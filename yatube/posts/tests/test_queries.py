@@ -0,0 +1,81 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+
+# Максимальное число SQL-запросов на страницу вне зависимости от объема
+# данных. Для авторизованного клиента сюда входят запросы сессии и
+# пользователя, для post_detail - еще и автор поста для ETag.
+QUERY_BUDGETS = {
+    'posts:index': 4,
+    'posts:group_list': 5,
+    'posts:profile': 7,
+    'posts:post_detail': 6,
+    'posts:follow_index': 4,
+}
+DATA_SIZES = (1, 25)
+
+
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def fill(self, size):
+        """Создает size авторов с постами в разных группах и комментариями."""
+        for i in range(size):
+            author = User.objects.create_user(username=f'author-{i}')
+            group = Group.objects.create(
+                title=f'group {i}', slug=f'group-{i}', description='-'
+            )
+            Follow.objects.create(user=self.reader, author=author)
+            post = Post.objects.create(
+                text=f'text {i}', author=author, group=group
+            )
+            Comment.objects.create(post=post, author=author, text='text')
+        post = Post.objects.create(
+            text='text', author=author, group=group
+        )
+        Comment.objects.bulk_create(
+            Comment(post=post, author=commenter, text='text')
+            for commenter in User.objects.all()
+        )
+        return {
+            'posts:index': reverse('posts:index'),
+            'posts:group_list': reverse(
+                'posts:group_list', kwargs={'slug': group.slug}
+            ),
+            'posts:profile': reverse(
+                'posts:profile', kwargs={'username': author.username}
+            ),
+            'posts:post_detail': reverse(
+                'posts:post_detail', kwargs={'post_id': post.id}
+            ),
+            'posts:follow_index': reverse('posts:follow_index'),
+        }
+
+    def test_views_stay_within_query_budget(self):
+        """Число запросов не растет вместе с числом постов и комментариев."""
+        for size in DATA_SIZES:
+            urls = self.fill(size)
+            for name, url in urls.items():
+                with self.subTest(view=name, size=size):
+                    cache.clear()
+                    with CaptureQueriesContext(connection) as queries:
+                        self.client.get(url)
+                    self.assertLessEqual(
+                        len(queries), QUERY_BUDGETS[name],
+                        '\n'.join(q['sql'] for q in queries.captured_queries)
+                    )
+            Post.objects.all().delete()
+            User.objects.exclude(pk=self.reader.pk).delete()
+            Group.objects.all().delete()
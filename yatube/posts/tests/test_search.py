@@ -0,0 +1,93 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Post, User
+from posts.search import match_query, stem
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='admin'
+        )
+
+    def setUp(self):
+        self.client = Client()
+
+    def found(self, query):
+        response = self.client.get(reverse('posts:search'), {'q': query})
+        return [post.text for post in response.context['page_obj']]
+
+    def test_match_query_stems_russian_words(self):
+        self.assertEqual(match_query('Новые ПОСТЫ!'), '"нов"* "пост"*')
+        self.assertEqual(match_query('"; DROP'), '"drop"*')
+        self.assertEqual(match_query('!!!'), '')
+
+    def test_stem_cuts_consonant_endings(self):
+        for words, expected in (
+            (('постов', 'посты', 'пост'), 'пост'),
+            (('котов', 'котами', 'котах', 'котам', 'котом'), 'кот'),
+            (('ежей', 'ежами', 'ежах'), 'еж'),
+            (('и', 'он'), None),
+        ):
+            for word in words:
+                with self.subTest(word=word):
+                    self.assertEqual(stem(word), expected or word)
+
+    def test_search_matches_consonant_endings(self):
+        Post.objects.create(text='Много постов о котах', author=self.user)
+        self.assertEqual(self.found('посты'), ['Много постов о котах'])
+        self.assertEqual(self.found('котами'), ['Много постов о котах'])
+
+    def test_search_finds_word_forms_ranked(self):
+        Post.objects.create(text='Про котов', author=self.user)
+        Post.objects.create(text='Кот, кот и еще раз коты', author=self.user)
+        Post.objects.create(text='Про собак', author=self.user)
+        self.assertEqual(
+            self.found('коты'), ['Кот, кот и еще раз коты', 'Про котов']
+        )
+        self.assertEqual(self.found(''), [])
+
+    def test_index_follows_edit_and_delete(self):
+        post = Post.objects.create(text='старый текст', author=self.user)
+        post.text = 'новый текст'
+        post.save()
+        self.assertEqual(self.found('старый'), [])
+        self.assertEqual(self.found('новый'), ['новый текст'])
+        post.delete()
+        self.assertEqual(self.found('текст'), [])
+
+    def test_rebuild_indexes_bulk_created_posts(self):
+        Post.objects.bulk_create(
+            Post(text=f'массовый пост {i}', author=self.user)
+            for i in range(3)
+        )
+        self.assertEqual(self.found('массовый'), [])
+        out = StringIO()
+        call_command('rebuild_search_index', batch_size=2, stdout=out)
+        self.assertIn('Проиндексировано постов: 3', out.getvalue())
+        self.assertEqual(len(self.found('массовые')), 3)
+
+    def test_pagination_keeps_query(self):
+        Post.objects.bulk_create(
+            Post(text=f'пост {i}', author=self.user) for i in range(12)
+        )
+        call_command('rebuild_search_index', stdout=StringIO())
+        response = self.client.get(reverse('posts:search'), {'q': 'пост'})
+        self.assertContains(response, '?q=%D0%BF%D0%BE%D1%81%D1%82&amp;page=2')
+
+    def test_admin_search_uses_index(self):
+        Post.objects.create(text='Искомые слова', author=self.user)
+        Post.objects.create(text='Искомое слово', author=self.user)
+        Post.objects.create(text='Другое', author=self.user)
+        self.client.force_login(self.admin)
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'искомое'}
+        )
+        self.assertEqual(response.context['cl'].result_count, 2)
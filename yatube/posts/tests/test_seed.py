@@ -0,0 +1,113 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import (
+    SimpleTestCase, TransactionTestCase, override_settings
+)
+from django.utils import timezone
+
+from posts import search
+from posts.management.commands.load_benchmark import summarize
+from posts.models import (
+    Comment, Follow, Group, Post, ThumbnailJob, TimelineEntry, User,
+    UserStats
+)
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class SeedTests(TransactionTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def seed(self):
+        call_command(
+            'seed', users=30, groups=3, posts=200, comments=300, follows=5,
+            images=2, image_ratio=0.5, days=30, batch_size=50, seed=1,
+            stdout=StringIO()
+        )
+
+    def test_seed_creates_consistent_corpus(self):
+        self.seed()
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 300)
+        self.assertTrue(Follow.objects.exists())
+        self.assertTrue(Post.objects.filter(
+            created__lt=timezone.now() - timedelta(days=1)
+        ).exists())
+        post = Post.objects.exclude(image='').first()
+        self.assertTrue(os.path.exists(post.image.path))
+        self.assertEqual(
+            ThumbnailJob.objects.filter(status=ThumbnailJob.PENDING).count(),
+            Post.objects.exclude(image='').count()
+        )
+        self.assertEqual(
+            (post.image_width, post.image_height),
+            (post.image.width, post.image.height)
+        )
+        stats = UserStats.objects.get(user=post.author)
+        self.assertEqual(stats.posts_count, post.author.posts.count())
+        self.assertEqual(
+            post.comments_count, Comment.objects.filter(post=post).count()
+        )
+        follow = Follow.objects.first()
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=follow.user_id).count(),
+            Post.objects.filter(
+                author__following__user=follow.user_id
+            ).count()
+        )
+        if search.is_supported():
+            word = post.text.split()[0].strip('.,')
+            self.assertTrue(search.filter_posts(Post.objects, word).exists())
+
+    def test_load_benchmark_reports_every_read_route(self):
+        self.seed()
+        output = os.path.join(TEMP_MEDIA_ROOT, 'bench.json')
+        call_command(
+            'load_benchmark', requests=4, concurrency=2, output=output,
+            seed=1, stdout=StringIO(), stderr=StringIO()
+        )
+        with open(output) as file:
+            routes = json.load(file)['routes']
+        self.assertIn('index', routes)
+        self.assertIn('follow_index', routes)
+        self.assertNotIn('add_comment', routes)
+        for name, result in routes.items():
+            with self.subTest(route=name):
+                self.assertEqual(result['requests'], 4)
+                self.assertEqual(result['errors'], 0)
+                self.assertLessEqual(result['p50'], result['p99'])
+
+
+class SummarizeTests(SimpleTestCase):
+    def test_percentiles_by_nearest_rank(self):
+        timings = [i / 1000 for i in range(100, 0, -1)]
+        result = summarize(timings, [200] * 99 + [500], wall=2)
+        self.assertEqual(
+            [result[key] for key in ('p50', 'p95', 'p99')], [50, 95, 99]
+        )
+        self.assertEqual(result['errors'], 1)
+        self.assertEqual(result['throughput'], 50)
+
+    def test_single_timing(self):
+        result = summarize([0.25], [200], wall=1)
+        self.assertEqual(result['p50'], result['p99'])
+        self.assertEqual(result['p99'], 250)
+
+    def test_no_timings(self):
+        result = summarize([], [], wall=1)
+        self.assertEqual(result['requests'], 0)
+        self.assertIsNone(result['p99'])
+        self.assertIsNone(result['mean'])
@@ -0,0 +1,204 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from sorl.thumbnail import get_thumbnail
+from sorl.thumbnail.images import ImageFile
+
+from posts.models import Post, ThumbnailJob, User
+from posts.thumbnails import (
+    cached_thumbnail, enqueue_missing, prefetch_thumbnails,
+    requeue_stale_jobs,
+    thumbnail_name
+)
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+def uploaded(name):
+    return SimpleUploadedFile(
+        name=name, content=SMALL_GIF, content_type='image/gif'
+    )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailPipelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_thumbnails_are_rendered_by_worker(self):
+        """Пока миниатюры не готовы, выводится заглушка; после """
+        """process_thumbnails - готовая картинка."""
+        self.client.post(
+            reverse('posts:post_create'),
+            data={'text': 'text', 'image': uploaded('first.gif')}
+        )
+        post = Post.objects.get()
+        job = ThumbnailJob.objects.get(post=post)
+        self.assertEqual(job.status, ThumbnailJob.PENDING)
+        detail = reverse('posts:post_detail', kwargs={'post_id': post.id})
+        self.assertContains(self.client.get(detail), 'aspect-ratio: 960 / 339')
+
+        call_command('process_thumbnails', workers=0, stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, ThumbnailJob.DONE)
+        for geometry in settings.POST_THUMBNAIL_GEOMETRIES:
+            with self.subTest(geometry=geometry):
+                self.assertIsNotNone(cached_thumbnail(post.image, geometry))
+        thumbnail = cached_thumbnail(post.image, '1300x700')
+        self.assertContains(
+            self.client.get(reverse('posts:index')), thumbnail.url
+        )
+
+    def test_missing_thumbnails_are_enqueued(self):
+        """Посты без сигналов (bulk_create) получают задания по запросу."""
+        name = default_storage.save('posts/bulk.gif', uploaded('bulk.gif'))
+        Post.objects.bulk_create(
+            Post(text=f'text {i}', author=self.user, image=name)
+            for i in range(2)
+        )
+        busy = Post.objects.order_by('pk').first()
+        ThumbnailJob.objects.create(post=busy, image=name)
+        self.assertEqual(enqueue_missing(), 1)
+        out = StringIO()
+        call_command(
+            'process_thumbnails', workers=0, enqueue_missing=True, stdout=out
+        )
+        self.assertIn('Поставлено в очередь: 0', out.getvalue())
+        for geometry in settings.POST_THUMBNAIL_GEOMETRIES:
+            with self.subTest(geometry=geometry):
+                self.assertIsNotNone(cached_thumbnail(name, geometry))
+        self.assertEqual(enqueue_missing(), 0)
+
+    def test_thumbnail_name_matches_sorl(self):
+        """Адаптер к закрытым методам sorl дает то же имя, под которым
+        get_thumbnail() сохраняет файл."""
+        post = Post.objects.create(
+            text='text', author=self.user, image=uploaded('name.gif')
+        )
+        for geometry in settings.POST_THUMBNAIL_GEOMETRIES:
+            with self.subTest(geometry=geometry):
+                self.assertEqual(
+                    thumbnail_name(ImageFile(post.image), geometry),
+                    get_thumbnail(
+                        post.image, geometry,
+                        **settings.POST_THUMBNAIL_OPTIONS
+                    ).name
+                )
+
+    def test_stale_running_jobs_are_requeued(self):
+        post = Post.objects.create(
+            text='text', author=self.user, image=uploaded('stale.gif')
+        )
+        job = ThumbnailJob.objects.get(post=post)
+        ThumbnailJob.objects.filter(pk=job.pk).update(
+            status=ThumbnailJob.RUNNING,
+            started=timezone.now() - timedelta(
+                seconds=settings.THUMBNAIL_JOB_TIMEOUT - 60
+            )
+        )
+        self.assertEqual(requeue_stale_jobs(), 0)
+        ThumbnailJob.objects.filter(pk=job.pk).update(
+            started=timezone.now() - timedelta(
+                seconds=settings.THUMBNAIL_JOB_TIMEOUT + 60
+            )
+        )
+        call_command('process_thumbnails', workers=0, stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, ThumbnailJob.DONE)
+
+    def test_replaced_image_drops_old_thumbnails(self):
+        post = Post.objects.create(
+            text='text', author=self.user, image=uploaded('old.gif')
+        )
+        call_command('process_thumbnails', workers=0, stdout=StringIO())
+        old_image = post.image.name
+        self.assertIsNotNone(cached_thumbnail(old_image, '960x339'))
+
+        self.client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.id}),
+            data={'text': 'text', 'image': uploaded('new.gif')}
+        )
+        post.refresh_from_db()
+        self.assertIsNone(cached_thumbnail(old_image, '960x339'))
+        self.assertTrue(ThumbnailJob.objects.filter(
+            image=post.image.name, status=ThumbnailJob.PENDING
+        ).exists())
+
+    def test_uploaded_image_size_is_stored(self):
+        post = Post.objects.create(
+            text='text', author=self.user, image=uploaded('size.gif')
+        )
+        self.assertEqual((post.image_width, post.image_height), (2, 1))
+        post.image = None
+        post.save()
+        self.assertEqual((post.image_width, post.image_height), (None, None))
+
+    def test_image_sizes_are_backfilled(self):
+        name = default_storage.save('posts/old.gif', uploaded('old.gif'))
+        Post.objects.bulk_create([
+            Post(text='old', author=self.user, image=name),
+            Post(text='lost', author=self.user, image='posts/lost.gif'),
+            Post(text='plain', author=self.user),
+        ])
+        out = StringIO()
+        call_command('backfill_image_sizes', stdout=out)
+        self.assertIn('Обработано постов: 2, не удалось прочитать: 1',
+                      out.getvalue())
+        self.assertEqual(
+            dict(Post.objects.values_list('text', 'image_width')),
+            {'old': 2, 'lost': None, 'plain': None}
+        )
+        self.assertEqual(Post.objects.get(text='old').image_height, 1)
+
+    def test_prefetch_thumbnails_uses_one_lookup_per_page(self):
+        posts = [
+            Post.objects.create(
+                text='text', author=self.user, image=uploaded(f'{i}.gif')
+            )
+            for i in range(3)
+        ]
+        call_command('process_thumbnails', workers=0, stdout=StringIO())
+        posts.append(Post.objects.create(
+            text='text', author=self.user, image='posts/missing.gif'
+        ))
+        cache.clear()
+        with self.assertNumQueries(1):
+            prefetch_thumbnails(posts, '960x339')
+        with self.assertNumQueries(0):
+            prefetch_thumbnails(posts, '960x339')
+        for post in posts[:3]:
+            self.assertEqual(
+                post.thumbnails['960x339'].url,
+                cached_thumbnail(post.image, '960x339').url
+            )
+        self.assertIsNone(posts[3].thumbnails['960x339'])
@@ -1,5 +1,6 @@
 from http import HTTPStatus
 
+from django.core.cache import cache
 from django.test import Client, TestCase
 
 from posts.models import Group, Post, User
@@ -27,9 +28,13 @@ class PostsURLTests(TestCase):
             f'/profile/{cls.user.username}/': [False, 'posts/profile.html'],
             f'/posts/{cls.post.id}/': [False, 'posts/post_detail.html'],
             f'/posts/{cls.post.id}/edit/': [True, 'posts/create_post.html'],
+            f'/posts/{cls.post.id}/comments/': [
+                False, 'includes/comments.html'
+            ],
         }
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user)
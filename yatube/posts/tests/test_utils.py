@@ -0,0 +1,49 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from posts.models import Post, User
+from posts.utils import CursorPaginator
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        author = User.objects.create_user(username='author')
+        Post.objects.bulk_create(
+            Post(text=f'text {i}', author=author) for i in range(3)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_elided_page_range(self):
+        """Выводится окно страниц вокруг текущей, а не все страницы."""
+        paginator = CursorPaginator(range(1000), 10)
+        ellipsis = CursorPaginator.ELLIPSIS
+        expect = {
+            1: [1, 2, 3, ellipsis, 100],
+            4: [1, 2, 3, 4, 5, 6, ellipsis, 100],
+            50: [1, ellipsis, 48, 49, 50, 51, 52, ellipsis, 100],
+            100: [1, ellipsis, 98, 99, 100],
+        }
+        for number, window in expect.items():
+            with self.subTest(number=number):
+                self.assertEqual(
+                    list(paginator.get_elided_page_range(number)), window
+                )
+        self.assertEqual(
+            list(CursorPaginator(range(30), 10).get_elided_page_range(2)),
+            [1, 2, 3]
+        )
+
+    def test_count_is_cached_under_count_key(self):
+        """COUNT(*) выполняется один раз на count_key."""
+        with self.assertNumQueries(1):
+            for _ in range(2):
+                paginator = CursorPaginator(
+                    Post.objects.all(), 10, count_key='test'
+                )
+                self.assertEqual(paginator.count, 3)
+        with self.assertNumQueries(1):
+            CursorPaginator(Post.objects.all(), 10, count_key='new').count
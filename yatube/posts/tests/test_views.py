@@ -1,5 +1,6 @@
 import shutil
 import tempfile
+from unittest import mock
 
 from django import forms
 from django.conf import settings
@@ -8,8 +9,13 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.paginator import Paginator
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
 
-from posts.models import Follow, Group, Post, User
+from posts import timeline
+from posts.models import (
+    Comment, Follow, Group, Post, TimelineEntry, User
+)
+from posts.utils import COUNT_DISPLAYED_COMMENTS
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
@@ -57,6 +63,7 @@ class PostsViewsTests(TestCase):
         shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
 
     def setUp(self):
+        cache.clear()
         self.authorized_client = Client()
         self.authorized_client.force_login(PostsViewsTests.user)
 
@@ -188,6 +195,27 @@ class PostsViewsTests(TestCase):
             response = self.client.get(page + '?page=2')
             self.assertEqual(response.context['page_obj'].end_index(), 17)
 
+    def test_cursor_pages_continue_numbered_pages(self):
+        """Курсор ?after= выдает те же посты, что и вторая страница."""
+        for page in self.pages_for_test:
+            with self.subTest(page=page):
+                first = self.client.get(page).context['page_obj']
+                second = self.client.get(page + '?page=2').context['page_obj']
+                response = self.client.get(
+                    page + f'?after={first.next_cursor}'
+                )
+                cursor_page = response.context['page_obj']
+                self.assertEqual(
+                    list(cursor_page.object_list),
+                    list(second.object_list)
+                )
+                self.assertFalse(cursor_page.has_next())
+                self.assertContains(response, '?page=1')
+
+    def test_broken_cursor_falls_back_to_first_page(self):
+        response = self.client.get(reverse('posts:index') + '?after=broken')
+        self.assertEqual(response.context['page_obj'].number, 1)
+
     def test_image_exists_in_every_desired_location(self):
         """Изображение передается в контекст необходимых страниц"""
         form_data = {
@@ -207,6 +235,8 @@ class PostsViewsTests(TestCase):
             reverse('posts:post_detail', kwargs={'post_id': 18})
         ]
         for url in test_urls:
+            # Контекст view есть только у страницы, собранной заново.
+            cache.clear()
             context = self.authorized_client.get(url).context
             if context.get('page_obj'):
                 self.assertEqual(
@@ -236,16 +266,49 @@ class PostsViewsTests(TestCase):
         self.assertEqual(comment_text, form_data['text'])
 
     def test_cache(self):
-        cached_index = self.client.get(reverse('posts:index')).content
-        self.latest_post.delete
-        self.assertEqual(
-            cached_index,
-            self.client.get(reverse('posts:index')).content
+        """Лента отдается из кеша без запросов к БД и сбрасывается """
+        """сразу после изменения поста."""
+        index = reverse('posts:index')
+        cached_index = self.client.get(index).content
+        with self.assertNumQueries(0):
+            self.assertEqual(cached_index, self.client.get(index).content)
+        Post.objects.get(pk=self.latest_post.pk).delete()
+        self.assertNotContains(
+            self.client.get(index), self.latest_post.text
         )
-        cache.clear()
-        self.assertNotEqual(
-            cached_index,
-            self.client.get(reverse('posts:index')).content
+
+    def test_cache_key_includes_page(self):
+        """Каждая страница ленты кешируется отдельно."""
+        for page in self.pages_for_test:
+            with self.subTest(page=page):
+                first = self.client.get(page).content
+                self.assertNotEqual(
+                    first, self.client.get(page + '?page=2').content
+                )
+
+    def test_switcher_tabs_mark_current_page(self):
+        tabs = {
+            'posts:index': reverse('posts:index'),
+            'posts:follow_index': reverse('posts:follow_index'),
+            'posts:profile': reverse(
+                'posts:profile', kwargs={'username': self.user.username}
+            ),
+        }
+        for view_name, url in tabs.items():
+            with self.subTest(view_name=view_name):
+                response = self.authorized_client.get(url)
+                for title, link in zip(
+                    ('ВСЕ АВТОРЫ', 'ИЗБРАННЫЕ АВТОРЫ', 'МОИ ПОСТЫ'),
+                    tabs.values()
+                ):
+                    self.assertContains(response, title)
+                    self.assertContains(response, f'href="{link}"')
+                self.assertRegex(
+                    response.content.decode(),
+                    rf'nav-link active"\s+href="{url}"'
+                )
+        self.assertNotContains(
+            self.client.get(tabs['posts:index']), 'МОИ ПОСТЫ'
         )
 
 
@@ -312,3 +375,136 @@ class PostsFollowTests(TestCase):
         response = self.authorized_client.get(reverse('posts:follow_index'))
         content = response.context['page_obj'][0]
         self.assertEqual(content.text, 'text')
+
+    def test_follow_index_reads_materialized_timeline(self):
+        """Лента подписок заполняется при подписке и новом посте,
+        очищается при отписке и ограничена TIMELINE_LENGTH."""
+        self.authorized_client.get(reverse(
+            'posts:profile_follow',
+            kwargs={'username': self.author.username})
+        )
+        self.assertEqual(self.user.timeline.count(), 1)
+        with mock.patch('posts.timeline.TIMELINE_LENGTH', 2):
+            for i in range(3):
+                Post.objects.create(text=f'text {i}', author=self.author)
+        self.assertEqual(
+            [entry.post.text for entry in self.user.timeline.order_by(
+                '-created'
+            )],
+            ['text 2', 'text 1']
+        )
+        self.authorized_client.get(reverse(
+            'posts:profile_unfollow',
+            kwargs={'username': self.author.username})
+        )
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(len(response.context['page_obj']), 0)
+
+    def test_timeline_trim_keeps_ties_inside_limit(self):
+        """Записи с тем же created, что у первой лишней, но внутри
+        TIMELINE_LENGTH, не удаляются."""
+        Post.objects.bulk_create(
+            Post(text=f'text {i}', author=self.author) for i in range(3)
+        )
+        posts = Post.objects.filter(text__startswith='text ').order_by('pk')
+        moment = timezone.now()
+        TimelineEntry.objects.bulk_create(
+            TimelineEntry(user=self.user, post=post, created=moment)
+            for post in posts
+        )
+        with mock.patch('posts.timeline.TIMELINE_LENGTH', 2):
+            timeline._overflow([self.user.pk]).delete()
+        self.assertEqual(
+            list(self.user.timeline.values_list('post_id', flat=True)
+                 .order_by('post_id')),
+            [post.pk for post in posts[1:]]
+        )
+
+    def test_unfollow_refills_trimmed_timeline(self):
+        """После отписки от автора, занимавшего всю ленту, в ней снова
+        посты остальных подписок, вытесненные раньше."""
+        other = User.objects.create_user(username='other')
+        with mock.patch('posts.timeline.TIMELINE_LENGTH', 3):
+            Follow.objects.create(user=self.user, author=other)
+            older = [
+                Post.objects.create(text=f'old {i}', author=other)
+                for i in range(2)
+            ]
+            Follow.objects.create(user=self.user, author=self.author)
+            for i in range(3):
+                Post.objects.create(text=f'new {i}', author=self.author)
+            self.assertFalse(
+                self.user.timeline.filter(post__author=other).exists()
+            )
+            Follow.objects.filter(user=self.user, author=self.author).delete()
+        client = Client()
+        client.force_login(self.user)
+        page = client.get(reverse('posts:follow_index')).context['page_obj']
+        self.assertEqual(
+            [post.pk for post in page], [post.pk for post in older[::-1]]
+        )
+
+
+class CommentsViewsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='commenter')
+        cls.post = Post.objects.create(text='text', author=cls.user)
+        for i in range(COUNT_DISPLAYED_COMMENTS + 5):
+            Comment.objects.create(
+                post=cls.post, author=cls.user, text=f'Комментарий #{i}'
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_post_detail_renders_first_chunk(self):
+        """На странице поста только первый кусок комментариев """
+        """и ссылка на следующий."""
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        )
+        comments = response.context['comments']
+        self.assertEqual(len(comments), COUNT_DISPLAYED_COMMENTS)
+        self.assertEqual(comments[0].text, 'Комментарий #24')
+        self.assertContains(
+            response,
+            reverse('posts:post_comments', kwargs={'post_id': self.post.id})
+            + f'?after={comments.next_cursor}'
+        )
+
+    def test_fragment_continues_after_cursor(self):
+        url = reverse('posts:post_comments', kwargs={'post_id': self.post.id})
+        first = self.client.get(url).context['comments']
+        response = self.client.get(url, {'after': first.next_cursor})
+        self.assertNotContains(response, '<html')
+        self.assertEqual(
+            [comment.text for comment in response.context['comments']],
+            [f'Комментарий #{i}' for i in range(4, -1, -1)]
+        )
+        self.assertFalse(response.context['comments'].has_next())
+        missing = reverse('posts:post_comments', kwargs={'post_id': 0})
+        self.assertEqual(self.client.get(missing).status_code, 404)
+
+    def test_ajax_comment_returns_fragment(self):
+        url = reverse('posts:add_comment', kwargs={'post_id': self.post.id})
+        response = self.client.post(
+            url, {'text': 'Новый'}, HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertTemplateUsed(response, 'includes/comment.html')
+        self.assertContains(response, 'Новый', status_code=201)
+        self.assertNotContains(response, '<html', status_code=201)
+        response = self.client.post(
+            url, {'text': ''}, HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        )
+        self.assertContains(response, 'class="errorlist', status_code=400)
+        # Скрипт страницы вставляет этот список в форму комментария.
+        self.assertContains(
+            self.client.get(reverse(
+                'posts:post_detail', kwargs={'post_id': self.post.id}
+            )),
+            'data-comment-errors'
+        )
@@ -0,0 +1,171 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from sorl.thumbnail import default, delete, get_thumbnail
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import (
+    EMPTY_VALUE, KVStore as CachedDBKVStore
+)
+from sorl.thumbnail.models import KVStore
+
+from core.cache import bump_generations
+
+from .models import Post, ThumbnailJob
+from .utils import post_cache_scopes
+
+logger = logging.getLogger(__name__)
+
+
+def thumbnail_name(source, geometry):
+    """Имя файла, под которым get_thumbnail() sorl сохранит миниатюру.
+
+    Единственное место, где вызываются закрытые методы бэкенда sorl
+    (_get_format, _get_thumbnail_filename): после обновления sorl
+    проверять нужно только его, это делает test_thumbnail_name_matches.
+    Опции дополняются так же, как в get_thumbnail().
+    """
+    backend = default.backend
+    options = dict(settings.POST_THUMBNAIL_OPTIONS)
+    if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    return backend._get_thumbnail_filename(source, geometry, options)
+
+
+def thumbnail_file(image, geometry):
+    """Файл миниатюры image: имя считается без обращения к хранилищу."""
+    return ImageFile(
+        thumbnail_name(ImageFile(image), geometry), default.storage
+    )
+
+
+def cached_thumbnail(image, geometry):
+    """Готовая миниатюра image или None, если ее еще не построили.
+
+    В отличие от {% thumbnail %} никогда не открывает исходный файл.
+    """
+    if not image:
+        return None
+    return default.kvstore.get(thumbnail_file(image, geometry))
+
+
+def prefetch_thumbnails(posts, geometry):
+    """Кладет в post.thumbnails[geometry] миниатюры всех постов сразу.
+
+    Вместо отдельного обращения к kvstore sorl на каждый пост - один
+    get_many к кешу и один запрос к таблице kvstore на промахи.
+    """
+    posts = [post for post in posts if post.image]
+    if not isinstance(default.kvstore, CachedDBKVStore):
+        for post in posts:
+            post.__dict__.setdefault('thumbnails', {})[geometry] = (
+                cached_thumbnail(post.image, geometry)
+            )
+        return
+    keys = [
+        add_prefix(thumbnail_file(post.image, geometry).key)
+        for post in posts
+    ]
+    kv_cache = default.kvstore.cache
+    values = kv_cache.get_many(keys)
+    missing = set(keys) - set(values)
+    if missing:
+        found = dict(KVStore.objects.filter(
+            key__in=missing
+        ).values_list('key', 'value'))
+        # Как и sorl, запоминаем в кеше и отсутствие миниатюры.
+        kv_cache.set_many(
+            {key: found.get(key, EMPTY_VALUE) for key in missing},
+            thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT
+        )
+        values.update(found)
+    for post, key in zip(posts, keys):
+        value = values.get(key, EMPTY_VALUE)
+        post.__dict__.setdefault('thumbnails', {})[geometry] = (
+            None if value == EMPTY_VALUE else deserialize_image_file(value)
+        )
+
+
+def image_replaced(post, previous_image):
+    """Сбрасывает миниатюры старой картинки и ставит в очередь новую."""
+    if previous_image:
+        delete(previous_image, delete_file=False)
+    if post.image:
+        ThumbnailJob.objects.create(post=post, image=post.image.name)
+
+
+def enqueue_missing(batch_size=500):
+    """Ставит в очередь посты, у картинки которых нет какой-то миниатюры.
+
+    Сигналы не ставят заданий на посты из bulk_create (seed), на посты
+    старше очереди и на новые размеры в POST_THUMBNAIL_GEOMETRIES.
+    Посты с заданием в очереди или в работе пропускаются. Возвращает
+    число новых заданий.
+    """
+    posts = Post.objects.exclude(image='').only('pk', 'image')
+    active = (ThumbnailJob.PENDING, ThumbnailJob.RUNNING)
+    queued = 0
+    last_pk = 0
+    while True:
+        batch = list(posts.filter(pk__gt=last_pk).order_by('pk')[:batch_size])
+        if not batch:
+            return queued
+        last_pk = batch[-1].pk
+        for geometry in settings.POST_THUMBNAIL_GEOMETRIES:
+            prefetch_thumbnails(batch, geometry)
+        busy = set(ThumbnailJob.objects.filter(
+            post__in=batch, status__in=active
+        ).values_list('post_id', 'image'))
+        jobs = [
+            ThumbnailJob(post=post, image=post.image.name)
+            for post in batch
+            if None in post.thumbnails.values()
+            and (post.pk, post.image.name) not in busy
+        ]
+        ThumbnailJob.objects.bulk_create(jobs)
+        queued += len(jobs)
+
+
+def render_thumbnails(image):
+    for geometry in settings.POST_THUMBNAIL_GEOMETRIES:
+        get_thumbnail(image, geometry, **settings.POST_THUMBNAIL_OPTIONS)
+
+
+def requeue_stale_jobs(timeout=None):
+    """Возвращает в очередь задания, зависшие в RUNNING дольше timeout.
+
+    Так повторяются задания упавшего посреди работы обработчика.
+    """
+    timeout = timeout or settings.THUMBNAIL_JOB_TIMEOUT
+    return ThumbnailJob.objects.filter(
+        status=ThumbnailJob.RUNNING,
+        started__lt=timezone.now() - timedelta(seconds=timeout)
+    ).update(status=ThumbnailJob.PENDING, started=None)
+
+
+def process_job(job_id):
+    """Строит все миниатюры задания, если его не забрал другой поток."""
+    claimed = ThumbnailJob.objects.filter(
+        pk=job_id, status=ThumbnailJob.PENDING
+    ).update(status=ThumbnailJob.RUNNING, started=timezone.now())
+    if not claimed:
+        return
+    job = ThumbnailJob.objects.select_related('post').get(pk=job_id)
+    status = ThumbnailJob.DONE
+    # Картинку успели заменить: ее миниатюры построит новое задание.
+    if job.post.image.name == job.image:
+        try:
+            render_thumbnails(job.post.image)
+        except Exception:
+            logger.exception('Не удалось построить миниатюры %s', job)
+            status = ThumbnailJob.FAILED
+    ThumbnailJob.objects.filter(pk=job_id).update(status=status)
+    # Новая версия карточки поста: вместо заглушки - миниатюра.
+    Post.objects.filter(pk=job.post_id).update(updated=timezone.now())
+    # Ленты с заглушкой вместо картинки лежат в кеше - сбрасываем их.
+    bump_generations(*post_cache_scopes(job.post))
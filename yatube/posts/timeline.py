@@ -0,0 +1,114 @@
+from django.db.models import OuterRef, Q, Subquery
+
+from .models import Follow, Post, TimelineEntry
+from .utils import FEED_ORDERING, get_page
+
+TIMELINE_LENGTH = 1000
+TIMELINE_ORDERING = ('-created', '-post_id')
+
+
+def _overflow(users):
+    """Записи лент users, вытесненные за пределы TIMELINE_LENGTH.
+
+    Граница - первая лишняя запись по ключу ленты (created, post_id):
+    записи с тем же created, что и у нее, но внутри ленты остаются.
+    """
+    bound = TimelineEntry.objects.filter(
+        user_id=OuterRef('user_id')
+    ).order_by(*TIMELINE_ORDERING)[TIMELINE_LENGTH:TIMELINE_LENGTH + 1]
+    bound_created = Subquery(bound.values('created'))
+    return TimelineEntry.objects.filter(
+        Q(created__lt=bound_created)
+        | Q(created=bound_created,
+            post_id__lte=Subquery(bound.values('post_id'))),
+        user_id__in=users
+    )
+
+
+def fan_out(post):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post=post, created=post.created)
+            for user_id in followers
+        ],
+        ignore_conflicts=True
+    )
+    _overflow(followers).delete()
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту читателя последние посты нового автора."""
+    posts = Post.objects.filter(author_id=author_id).order_by(
+        *FEED_ORDERING
+    ).values_list('id', 'created')[:TIMELINE_LENGTH]
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post_id=post_id, created=created)
+            for post_id, created in posts
+        ],
+        ignore_conflicts=True
+    )
+    _overflow([user_id]).delete()
+
+
+def rebuild(user_ids):
+    """Собирает ленты читателей user_ids заново по их подпискам."""
+    TimelineEntry.objects.filter(user_id__in=user_ids).delete()
+    for user_id in user_ids:
+        posts = Post.objects.filter(
+            author__following__user_id=user_id
+        ).order_by(*FEED_ORDERING).values_list(
+            'id', 'created'
+        )[:TIMELINE_LENGTH]
+        TimelineEntry.objects.bulk_create([
+            TimelineEntry(user_id=user_id, post_id=post_id, created=created)
+            for post_id, created in posts
+        ])
+
+
+def drop(user_id, author_id):
+    """Убирает из ленты читателя посты автора, от которого он отписался.
+
+    Освободившиеся места занимают посты остальных подписок старше
+    последней записи ленты: их раньше вытеснил _overflow.
+    """
+    entries = TimelineEntry.objects.filter(user_id=user_id)
+    entries.filter(post__author_id=author_id).delete()
+    missing = TIMELINE_LENGTH - entries.count()
+    if missing <= 0:
+        return
+    posts = Post.objects.filter(author__following__user_id=user_id)
+    oldest = entries.order_by(*TIMELINE_ORDERING).values(
+        'created', 'post_id'
+    ).last()
+    if oldest:
+        posts = posts.filter(
+            Q(created__lt=oldest['created'])
+            | Q(created=oldest['created'], id__lt=oldest['post_id'])
+        )
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post_id=post_id, created=created)
+            for post_id, created in posts.order_by(
+                *FEED_ORDERING
+            ).values_list('id', 'created')[:missing]
+        ],
+        ignore_conflicts=True
+    )
+
+
+def get_timeline_page(request, user):
+    """Страница ленты подписок, прочитанная только из записей читателя."""
+    entries = TimelineEntry.objects.filter(user=user).select_related(
+        'post__author', 'post__group'
+    )
+    # Без count_key: COUNT(*) идет по индексу (user, -created, -post) и
+    # не бывает больше TIMELINE_LENGTH строк, а поколения у личной
+    # ленты нет - кешированное число устарело бы при каждом fan_out.
+    page = get_page(request, entries, keys=('created', 'post_id'))
+    page.object_list = [entry.post for entry in page]
+    return page
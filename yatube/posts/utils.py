@@ -0,0 +1,256 @@
+from functools import wraps
+
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_datetime
+from django.utils.encoding import force_bytes, force_str
+from django.utils.functional import SimpleLazyObject, cached_property
+from django.utils.http import (
+    http_date, urlsafe_base64_decode, urlsafe_base64_encode
+)
+
+from core.cache import get_changed_at, get_generations, page_etag
+from core.tiered_cache import get_or_compute
+
+COUNT_DISPLAYED_OBJECTS = 10
+COUNT_DISPLAYED_COMMENTS = 20
+FEED_KEYS = ('created', 'id')
+FEED_ORDERING = ('-created', '-id')
+
+
+def encode_cursor(obj, keys=FEED_KEYS):
+    """Непрозрачный курсор ?after= по ключу (created, id) объекта.
+
+    obj - модель или строка values().
+    """
+    if isinstance(obj, dict):
+        created, pk = (obj[key] for key in keys)
+    else:
+        created, pk = (getattr(obj, key) for key in keys)
+    return urlsafe_base64_encode(
+        force_bytes(f'{created.isoformat()}|{pk}')
+    )
+
+
+def decode_cursor(token):
+    """Возвращает (created, id) из курсора или None, если он испорчен."""
+    try:
+        created, pk = force_str(urlsafe_base64_decode(token)).split('|')
+        created = parse_datetime(created)
+        pk = int(pk)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        return None
+    if created is None:
+        return None
+    return created, pk
+
+
+class CursorPage(Page):
+    """Страница ленты, выбранная по курсору: без COUNT(*) и OFFSET."""
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, next_cursor):
+        super().__init__(object_list, None, paginator)
+        self.next_cursor = next_cursor
+
+    def __repr__(self):
+        return '<Cursor page>'
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return True
+
+    def start_index(self):
+        return 1 if self.object_list else 0
+
+    def end_index(self):
+        return len(self.object_list)
+
+
+class CursorPaginator(Paginator):
+    """Paginator ленты постов.
+
+    Умеет выбирать страницу по ключу keys - полям (created, id), по
+    убыванию которых упорядочен object_list, - кеширует COUNT(*) под
+    count_key и строит сокращенный список номеров страниц.
+    """
+    ELLIPSIS = '…'
+
+    def __init__(self, object_list, per_page, count_key=None,
+                 keys=FEED_KEYS, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_key = count_key
+        self.keys = keys
+
+    @cached_property
+    def count(self):
+        if self.count_key is None:
+            return super().count
+        # Одновременные промахи после сдвига поколения ждут один COUNT(*).
+        return get_or_compute(
+            f'feed-count:{self.count_key}',
+            lambda: super(CursorPaginator, self).count,
+            None
+        )
+
+    def get_elided_page_range(self, number, on_each_side=2, on_ends=1):
+        """Номера страниц вокруг number и по краям, пропуски - ELLIPSIS."""
+        if self.num_pages <= (on_each_side + on_ends) * 2 + 1:
+            yield from self.page_range
+            return
+        if number > on_each_side + on_ends + 1:
+            yield from range(1, on_ends + 1)
+            yield self.ELLIPSIS
+            yield from range(number - on_each_side, number + 1)
+        else:
+            yield from range(1, number + 1)
+        if number < self.num_pages - on_each_side - on_ends:
+            yield from range(number + 1, number + on_each_side + 1)
+            yield self.ELLIPSIS
+            yield from range(self.num_pages - on_ends + 1, self.num_pages + 1)
+        else:
+            yield from range(number + 1, self.num_pages + 1)
+
+    def page_after(self, token):
+        bound = decode_cursor(token)
+        if bound is None:
+            return self.get_page(1)
+        return self.cursor_page(bound)
+
+    def cursor_page(self, bound=None):
+        """Страница после ключа bound (или с начала) без COUNT(*)."""
+        rows = self.object_list
+        if bound is not None:
+            created, pk = bound
+            created_key, pk_key = self.keys
+            rows = rows.filter(
+                Q(**{f'{created_key}__lt': created})
+                | Q(**{created_key: created, f'{pk_key}__lt': pk})
+            )
+        rows = list(rows[:self.per_page + 1])
+        next_cursor = None
+        if len(rows) > self.per_page:
+            rows = rows[:self.per_page]
+            next_cursor = encode_cursor(rows[-1], self.keys)
+        return CursorPage(rows, self, next_cursor)
+
+
+def get_page(request, posts, count_key=None, keys=FEED_KEYS):
+    """Страница ленты постов: по номеру ?page= или по курсору ?after=."""
+    paginator = CursorPaginator(
+        posts.order_by(*(f'-{key}' for key in keys)),
+        COUNT_DISPLAYED_OBJECTS,
+        count_key=count_key,
+        keys=keys
+    )
+    after = request.GET.get('after')
+    if after:
+        return paginator.page_after(after)
+    page = paginator.get_page(request.GET.get('page'))
+    page.next_cursor = page.has_next() and encode_cursor(
+        page[-1], keys
+    ) or None
+    page.page_window = list(paginator.get_elided_page_range(page.number))
+    return page
+
+
+def get_numbered_page(request, object_list):
+    """Страница по номеру ?page= для выдачи, упорядоченной не по ленте."""
+    paginator = CursorPaginator(object_list, COUNT_DISPLAYED_OBJECTS)
+    page = paginator.get_page(request.GET.get('page'))
+    page.page_window = list(paginator.get_elided_page_range(page.number))
+    return page
+
+
+def get_comments_page(request, comments):
+    """Кусок комментариев: первый или после курсора ?after=.
+
+    Выбирается по индексу (post, -created, -id) без COUNT(*) и OFFSET.
+    Испорченный курсор отдает первый кусок, как и в лентах.
+    """
+    paginator = CursorPaginator(
+        comments.select_related('author').order_by(*FEED_ORDERING),
+        COUNT_DISPLAYED_COMMENTS
+    )
+    after = request.GET.get('after')
+    return paginator.cursor_page(after and decode_cursor(after))
+
+
+def get_cached_page(request, posts, scope):
+    """Ленивая страница ленты и ключ ее фрагмента в кеше.
+
+    Страница вычисляется только при промахе кеша, поэтому попадание
+    не стоит ни одного SQL-запроса к ленте. Число постов кешируется
+    под тем же поколением области, фрагмент - еще и под поколением
+    GROUPS_SCOPE: в карточках выводятся названия групп.
+    """
+    generation, groups = get_generations(scope, GROUPS_SCOPE)
+    count_key = f'{scope}:{generation}'
+    page_obj = SimpleLazyObject(lambda: get_page(request, posts, count_key))
+    return page_obj, ':'.join((
+        count_key,
+        str(groups),
+        request.GET.get('page', ''),
+        request.GET.get('after', ''),
+    ))
+
+
+# Область всех страниц с названиями чужих групп: главной, профилей,
+# постов. Правка группы сдвигает ее и group-<slug> вместо поколений
+# каждого поста и автора группы.
+GROUPS_SCOPE = 'groups'
+
+
+def post_cache_scopes(post):
+    """Области кеша, в которых показывается пост."""
+    scopes = ['index', f'author-{post.author.username}', f'post-{post.pk}']
+    if post.group_id:
+        scopes.append(f'group-{post.group.slug}')
+    previous_group = getattr(post, '_previous_group_slug', None)
+    if previous_group:
+        scopes.append(f'group-{previous_group}')
+    return scopes
+
+
+def conditional_page(scopes):
+    """Отвечает 304 Not Modified, пока страница не могла измениться.
+
+    scopes(request, **kwargs) возвращает области кеша, из которых
+    собрана страница, или None, если ее нет. ETag складывается из их
+    поколений, пользователя и CSRF-cookie, Last-Modified - время
+    последнего сдвига поколения, то есть последнего создания или правки
+    поста или комментария в областях. Сама проверка не трогает БД:
+    запросы делает только scopes(), например post_detail узнает автора
+    поста одним запросом. Last-Modified отдается только анонимам: у них
+    страница одна на всех. Области сохраняются в request.cache_scopes для
+    core.middleware.PageCacheMiddleware.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            names = request.method in ('GET', 'HEAD') and scopes(
+                request, **kwargs
+            )
+            if not names:
+                return view(request, *args, **kwargs)
+            # Те же области - surrogate-ключи полностраничного кеша.
+            request.cache_scopes = names
+            etag = page_etag(request, get_generations(*names))
+            last_modified = None
+            if not request.user.is_authenticated:
+                last_modified = int(get_changed_at(*names))
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code == 200:
+                    response['ETag'] = etag
+                    if last_modified:
+                        response['Last-Modified'] = http_date(last_modified)
+            return response
+        return wrapper
+    return decorator
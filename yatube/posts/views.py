@@ -1,68 +1,110 @@
+from urllib.parse import urlencode
+
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.http import HttpResponseBadRequest
 from django.shortcuts import get_object_or_404, redirect, render
 
+from .counters import get_user_stats
 from .forms import CommentForm, PostForm
 from .models import Follow, Group, Post, User
-
-COUNT_DISPLAYED_OBJECTS = 10
+from .search import search_posts
+from .timeline import get_timeline_page
+from .utils import (
+    GROUPS_SCOPE, conditional_page, get_cached_page, get_comments_page,
+    get_numbered_page
+)
 
 
+@conditional_page(lambda request: ('index', GROUPS_SCOPE))
 def index(request):
-    posts = Post.objects.order_by('-created')
-    paginator = Paginator(posts, COUNT_DISPLAYED_OBJECTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj, feed_key = get_cached_page(
+        request, Post.objects.for_feed(), 'index'
+    )
     context = {
         'page_obj': page_obj,
+        'feed_key': feed_key,
         'title': 'Последние обновления на сайте',
     }
     return render(request, 'posts/index.html', context)
 
 
+def search(request):
+    query = request.GET.get('q', '').strip()
+    page_obj = get_numbered_page(
+        request, search_posts(Post.objects.for_feed(), query)
+    )
+    context = {
+        'page_obj': page_obj,
+        'query': query,
+        'page_query': urlencode({'q': query}) + '&',
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@conditional_page(lambda request, slug: (f'group-{slug}',))
 def group_list(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.order_by('-created')
-    paginator = Paginator(posts, COUNT_DISPLAYED_OBJECTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj, feed_key = get_cached_page(
+        request, group.posts.for_feed(), f'group-{slug}'
+    )
     context = {
         'group': group,
         'page_obj': page_obj,
+        'feed_key': feed_key,
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@conditional_page(lambda request, username: (
+    f'author-{username}', f'follows-{username}', GROUPS_SCOPE
+))
 def profile(request, username):
     user = get_object_or_404(User, username=username)
-    profile_posts = user.posts.order_by('-created')
-    paginator = Paginator(profile_posts, COUNT_DISPLAYED_OBJECTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    following = request.user.is_authenticated and (
-        user.following.filter(user=request.user)
+    page_obj, feed_key = get_cached_page(
+        request, user.posts.for_feed(), f'author-{username}'
     )
     context = {
         'page_obj': page_obj,
+        'feed_key': feed_key,
         'author': user,
-        'following': following,
+        'stats': get_user_stats(user),
     }
     return render(request, 'posts/profile.html', context)
 
 
+def post_detail_scopes(request, post_id):
+    # Число постов автора на странице меняется вместе с его лентой.
+    username = Post.objects.filter(pk=post_id).values_list(
+        'author__username', flat=True
+    ).first()
+    return username and (
+        f'post-{post_id}', f'author-{username}', GROUPS_SCOPE
+    )
+
+
+@conditional_page(post_detail_scopes)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    post_count = post.author.posts.count()
-    comments = post.comments.order_by('-created')
+    post = get_object_or_404(Post.objects.for_feed(), id=post_id)
+    post_count = get_user_stats(post.author).posts_count
     context = {
-        'form': CommentForm(),
-        'comments': comments,
+        'comments': get_comments_page(request, post.comments.all()),
         'post': post,
         'post_count': post_count,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+@conditional_page(lambda request, post_id: (f'post-{post_id}',))
+def post_comments(request, post_id):
+    """HTML следующего куска комментариев для кнопки «Показать еще»."""
+    post = get_object_or_404(Post.objects.only('id'), id=post_id)
+    context = {
+        'comments': get_comments_page(request, post.comments.all()),
+        'post_id': post.id,
+    }
+    return render(request, 'includes/comments.html', context)
+
+
 @login_required
 def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
@@ -78,7 +120,7 @@ def post_create(request):
 @login_required
 def post_edit(request, post_id):
     post = get_object_or_404(Post, id=post_id)
-    if request.user == post.author:
+    if request.user.pk == post.author_id:
         template = 'posts/create_post.html'
         form = PostForm(
             request.POST or None,
@@ -103,17 +145,19 @@ def add_comment(request, post_id):
         comment.author = request.user
         comment.post = post
         comment.save()
+        if request.is_ajax():
+            return render(
+                request, 'includes/comment.html', {'comment': comment},
+                status=201
+            )
+    elif request.is_ajax():
+        return HttpResponseBadRequest(form.errors.as_ul())
     return redirect('posts:post_detail', post_id)
 
 
 @login_required
 def follow_index(request):
-    user_follows_posts = Post.objects.filter(
-        author__following__user=request.user
-    ).order_by('-created')
-    paginator = Paginator(user_follows_posts, COUNT_DISPLAYED_OBJECTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = get_timeline_page(request, request.user)
     context = {
         'page_obj': page_obj,
         'title': 'Мои подписки',
@@ -1,4 +1,6 @@
 import os
+import sys
+import tempfile
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -31,12 +33,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'core.middleware.PageCacheMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
@@ -55,7 +60,7 @@ ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backends.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -70,11 +75,29 @@ TEMPLATES = [
     },
 ]
 
+# Кеш общий для всех воркеров узла: сдвиг поколения в одном процессе
+# сразу виден остальным. Тесты работают с собственным LocMemCache, чтобы
+# не делить файл с запущенным сервером и друг с другом.
+TESTING = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache_backends.SQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache.sqlite3'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 100_000,
+            'MAX_SIZE': 256 * 1024 * 1024,
+        },
     }
 }
+# Уровень в памяти процесса перед общим кешем (core.tiered_cache).
+TIERED_CACHE_LOCAL_SIZE = 1000
+TIERED_CACHE_LOCAL_TIMEOUT = 5
+if TESTING:
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+    # Иначе cache.clear() в тестах не доходил бы до памяти процесса.
+    TIERED_CACHE_LOCAL_SIZE = 0
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
@@ -114,8 +137,44 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media/')
+if TESTING:
+    # Загрузки и миниатюры тестов не попадают в рабочий каталог media.
+    MEDIA_ROOT = os.path.join(tempfile.gettempdir(), 'yatube-test-media/')
 MEDIA_URL = '/media/'
 
+# Полностраничный кеш: пространства имен URL и время жизни записей
+# (устаревшие поколения просто дожидаются вытеснения).
+PAGE_CACHE_NAMESPACES = ('posts', 'about')
+PAGE_CACHE_TIMEOUT = 60 * 60
+
+# Карточки постов кешируются под версией, поэтому устаревшие просто
+# дожидаются истечения.
+POST_CARD_TIMEOUT = 60 * 60 * 24
+
+# Миниатюры картинок постов, которые готовит process_thumbnails.
+POST_THUMBNAIL_GEOMETRIES = ('1300x700', '960x339', '1600x900')
+POST_THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+# Через сколько секунд задание в RUNNING считается брошенным упавшим
+# обработчиком и возвращается в очередь.
+THUMBNAIL_JOB_TIMEOUT = 10 * 60
+
 INTERNAL_IPS = [
     "127.0.0.1",
 ]
+
+# Метрики core.metrics: какие view учитывать и куда процессы сбрасывают
+# свои снимки для /metrics.
+METRICS_NAMESPACES = ('posts', 'users', 'about')
+METRICS_DIR = None if TESTING else os.path.join(BASE_DIR, 'metrics')
+
+# Профили запросов core.profiling: каталог снимков, сколько хранить,
+# срок жизни подписанного заголовка X-Profile и доля случайных запросов.
+PROFILE_DIR = os.path.join(BASE_DIR, 'profiles')
+PROFILE_KEEP = 200
+PROFILE_TOKEN_MAX_AGE = 60 * 60
+PROFILE_SAMPLE_RATE = 0
+
+# Микробенчмарки posts.benchmarks: повторов на случай и допустимый рост
+# относительно сохраненного эталона (0.5 - на 50%).
+BENCHMARK_REPEAT = 5
+BENCHMARK_THRESHOLDS = {'time': 0.5, 'queries': 0, 'memory': 0.25}